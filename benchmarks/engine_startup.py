@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+"""Benchmark --> Engine Startup:
+    Time to get a ready to use Babel / Prettier context.
+
+    - `before`: what `initialize()` used to do (read + eval every file, one context).
+    - `after`: one context per tool, built from the sources kept in memory.
+    - `pool`: filling a pool of N contexts (created in parallel).
+
+    Usage: python benchmarks/engine_startup.py [--size 4] [--output startup.json]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from xtyle import core
+
+
+def timed(method):
+    start = time.perf_counter()
+    method()
+    return time.perf_counter() - start
+
+
+def before():
+    ctx = core.MiniRacer()
+    for file_name in ["babel.min.js", "prettier-full.min.js", "custom.js"]:
+        with open(core.BASE_DIR / file_name, "r", encoding="utf-8") as file:
+            ctx.eval(file.read())
+    return ctx
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine startup benchmark")
+    parser.add_argument("--size", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = {
+        "before": [],
+        "after_first": {"jsx": [], "prettier": []},
+        "after_next": {"jsx": [], "prettier": []},
+        "pool_fill": [],
+        "pool_size": args.size,
+    }
+    for _ in range(args.repeat):
+        results["before"].append(timed(before))
+
+    for tool in ["jsx", "prettier"]:
+        core.read_source.cache_clear()
+        results["after_first"][tool].append(timed(lambda: core.create_context(tool)))
+        for _ in range(args.repeat):
+            results["after_next"][tool].append(
+                timed(lambda: core.create_context(tool))
+            )
+
+    for _ in range(args.repeat):
+        core._pools.clear()
+        core.configure_pool(args.size)
+        results["pool_fill"].append(timed(lambda: core.warmup("jsx")))
+
+    summary = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(summary)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
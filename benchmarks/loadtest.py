@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+
+"""Benchmark --> Load Test:
+    Drive `xtyle.Client` (or `AsyncClient`, or the live-code builds) at
+    several concurrency levels and report requests/s and latency percentiles,
+    emitted as JSON.
+
+    Runs against the local stand-in of the xtyle node server (with artificial
+    `--latency` / `--jitter`), or a real server with `--host`.
+
+    - targets: `minify`, `bundle` (`minify` of a `--batch` x 10 KB bundle),
+      `css`, `component`, `plugin`, `components` (batch of `--batch` items) and `build` (`build_components` of a synthetic module).
+    - `--mode threads`: one shared `Client`, N threads.
+    - `--mode async`: one shared `AsyncClient`, N requests in flight.
+    - `--compress gzip|deflate`: compressed request bodies (`Client` only),
+      the bytes on the wire are in `server`.
+
+    Usage: python benchmarks/loadtest.py --target component --concurrency 1 4 16 --requests 400 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import pathlib
+import platform
+import sys
+import tempfile
+import threading
+import time
+from importlib import metadata
+
+import xtyle
+from xtyle.live_code import environment as environment_module
+from xtyle.live_code import synthetic
+from xtyle.metrics import percentile
+from xtyle.stand_in import StandInServer
+
+CODE = "const app = {\n  // comment\n  name: 'app',\n  items: [1, 2, 3],\n};\n"
+STYLE = "$color: red;\n.app { color: $color; .title { font-weight: bold; } }\n"
+COMPONENT = {
+    "name": "custom-button",
+    "code": "export default function Component(props: Props = {}) {\n  return <button class={[$NAME, props.class]}>{props.children}</button>;\n}\n",
+    "style": "$color: red;\n.#{$NAME} { color: $color; }\n",
+    "props": "type Props = {\n  class?: string;\n  children?: any;\n};\n\nexport default Props;\n",
+    "docs": "/**\n * Button\n */\n",
+}
+
+CLIENT_TARGETS = ["minify", "bundle", "css", "component", "plugin", "components"]
+
+
+def summary(latencies: list, errors: int, elapsed: float, concurrency: int) -> dict:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": count,
+        "errors": errors,
+        "elapsed": elapsed,
+        "requests_per_second": count / elapsed if elapsed else None,
+        "mean": sum(latencies) / count if count else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1] if latencies else 0.0,
+    }
+
+
+def client_call(engine, target: str, batch: int):
+    match target:
+        case "minify":
+            return lambda: engine.minify(CODE)
+        case "bundle":
+            bundle = CODE * (batch * 10240 // len(CODE))
+            return lambda: engine.minify(bundle)
+        case "css":
+            return lambda: engine.css(STYLE)
+        case "component":
+            return lambda: engine.component(**COMPONENT)
+        case "plugin":
+            return lambda: engine.plugin("bench", [COMPONENT] * batch)
+        case "components":
+            if isinstance(engine, xtyle.AsyncClient):
+                return lambda: engine.component_many([COMPONENT] * batch)
+            return lambda: engine.components([COMPONENT] * batch)
+    raise ValueError(f"Unknown target: {target}")
+
+
+def run_threads(create_call, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = itertools.count()
+
+    def worker(call):
+        nonlocal errors
+        while next(counter) < total:
+            start = time.perf_counter()
+            try:
+                ok = bool(call())
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += not ok
+
+    threads = [
+        threading.Thread(target=worker, args=(create_call(),))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summary(latencies, errors, time.perf_counter() - start, concurrency)
+
+
+async def run_async(host: str, target: str, batch: int, concurrency: int, total: int):
+    latencies = []
+    errors = 0
+
+    async with xtyle.AsyncClient(
+        host, pool_size=concurrency, concurrency=concurrency
+    ) as engine:
+        call = client_call(engine, target, batch)
+        counter = itertools.count()
+
+        async def worker():
+            nonlocal errors
+            while next(counter) < total:
+                start = time.perf_counter()
+                try:
+                    ok = bool(await call())
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return summary(latencies, errors, elapsed, concurrency)
+
+
+def create_environment(base_dir: pathlib.Path, engine):
+    # Offline (skip downloading the xtyle types)
+    environment_module.get_xtyle_declarations = lambda: ""
+    return xtyle.Environment(base_dir=base_dir, xtyle_client=engine)
+
+
+def load_test(args, host: str, base_dir: pathlib.Path) -> list:
+    results = []
+    for concurrency in args.concurrency:
+        if args.target == "build":
+            engine = xtyle.client(host, pool_size=concurrency)
+            env_dir = base_dir / str(concurrency)
+            env_dir.mkdir()
+            env = create_environment(env_dir, engine)
+            synthetic.populate(env, modules=1, components=args.batch)
+            create_call = lambda: lambda: env.build_components("module-0")
+            results.append(run_threads(create_call, concurrency, args.requests))
+            engine.close()
+        elif args.mode == "async":
+            coroutine = run_async(
+                host, args.target, args.batch, concurrency, args.requests
+            )
+            results.append(asyncio.run(coroutine))
+        else:
+            engine = xtyle.client(host, pool_size=concurrency, compress=args.compress)
+            with engine:
+                create_call = lambda: client_call(engine, args.target, args.batch)
+                result = run_threads(create_call, concurrency, args.requests)
+                result["endpoints"] = engine.stats()
+                results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Xtyle client load test")
+    parser.add_argument(
+        "--target", default="component", choices=[*CLIENT_TARGETS, "build"]
+    )
+    parser.add_argument("--mode", default="threads", choices=["threads", "async"])
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=10, help="Components per call")
+    parser.add_argument("--compress", default=None, choices=["gzip", "deflate"])
+    parser.add_argument("--host", default=None, help="xtyle server (default: stand-in)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stand-in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Stand-in seconds")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "xtyle": metadata.version("xtyle"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "time": time.time(),
+            "target": args.target,
+            "mode": args.mode,
+            "requests": args.requests,
+            "batch": args.batch,
+            "compress": args.compress,
+            "host": args.host or "stand-in",
+            "latency": args.latency,
+            "jitter": args.jitter,
+        }
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir = pathlib.Path(tmp)
+        if args.host:
+            results["results"] = load_test(args, args.host, base_dir)
+        else:
+            server = StandInServer(latency=args.latency, jitter=args.jitter, seed=0)
+            with server:
+                results["results"] = load_test(args, server.url, base_dir)
+                results["server"] = server.stats().__dict__
+
+    summary_text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(summary_text)
+    print(summary_text)
+
+
+if __name__ == "__main__":
+    main()
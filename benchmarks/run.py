@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+
+"""Benchmark --> Suite:
+    Transforms, live-code builds and static rendering, emitted as JSON.
+
+    - `transforms`: `xtyle.jsx` / `scss` / `prettier` on small and large inputs.
+    - `environment`: `build_components` / `collect_applications` / `create_static`
+      on a synthetic environment (N modules x M components) built against the
+      local stand-in of the xtyle node server.
+    - `render`: `XtyleApp.render` throughput.
+    - `storage`: `--components` rows written one `set` at a time against one
+      `bulk_set` (single transaction), and listed (`all` against the admin
+      listing `rows_for_tables`).
+    - `client`: `xtyle.LocalClient` (in-process) against the HTTP path
+      (`--host`, default: the stand-in).
+
+    Usage: python benchmarks/run.py [--modules 5] [--components 20] [--output results.json]
+"""
+
+import argparse
+import itertools
+import json
+import pathlib
+import platform
+import random
+import sys
+import tempfile
+import time
+from importlib import metadata
+
+import xtyle
+from xtyle.live_code import environment as environment_module
+from xtyle.live_code import synthetic
+from xtyle.live_code.static import XtyleApp
+from xtyle.metrics import percentile
+from xtyle.stand_in import StandInServer
+
+SMALL_JSX = "const App = (props) => <div class={props.class}>{props.children}</div>;\n"
+SMALL_SCSS = "$color: red;\n.app { color: $color; .title { font-weight: bold; } }\n"
+SMALL_JS = "const app = {name:'app',items:[1,2,3],render(){return this.items.map(x=>x*2)}};\n"
+
+LARGE = 200
+
+COMPONENT = {
+    "name": "custom-button",
+    "code": "export default function Component(props: Props = {}) {\n  return <button class={[$NAME, props.class]}>{props.children}</button>;\n}\n",
+    "style": "$color: red;\n.#{$NAME} { color: $color; &:hover { opacity: 0.8; } }\n",
+    "props": "type Props = {\n  class?: string;\n  children?: any;\n};\n\nexport default Props;\n",
+    "docs": "/**\n * Button\n */\n",
+}
+
+
+def measure(method, repeat: int) -> dict:
+    return measure_each(lambda: None, lambda _: method(), repeat)
+
+
+def measure_each(setup, method, repeat: int) -> dict:
+    """`method(setup())`, only the `method` part is timed."""
+    times = []
+    for _ in range(repeat):
+        value = setup()
+        start = time.perf_counter()
+        method(value)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "count": len(times),
+        "mean": sum(times) / len(times),
+        "min": times[0],
+        "p50": percentile(times, 50),
+        "p95": percentile(times, 95),
+        "max": times[-1],
+    }
+
+
+def bench_transforms(repeat: int) -> dict:
+    xtyle.warmup()
+    inputs = {
+        "jsx": (xtyle.jsx, SMALL_JSX),
+        "scss": (xtyle.scss, SMALL_SCSS),
+        "prettier": (lambda code: xtyle.prettier(code, "javascript"), SMALL_JS),
+    }
+    output = {}
+    for name, (method, code) in inputs.items():
+        output[f"{name}.small"] = measure(lambda: method(code), repeat)
+        large = code * LARGE
+        output[f"{name}.large"] = measure(lambda: method(large), max(1, repeat // 10))
+    return output
+
+
+def create_environment(base_dir: pathlib.Path, host: str, modules: int, components: int):
+    # Offline (skip downloading the xtyle types)
+    environment_module.get_xtyle_declarations = lambda: ""
+    env = xtyle.Environment(base_dir=base_dir, xtyle_client=xtyle.client(host))
+    synthetic.populate(env, modules=modules, components=components)
+    return env
+
+
+def bench_environment(base_dir, host, modules: int, components: int, repeat: int):
+    start = time.perf_counter()
+    env = create_environment(base_dir, host, modules, components)
+    setup = time.perf_counter() - start
+    return env, {
+        "setup": setup,
+        "build_components": measure(lambda: env.build_components("module-0"), repeat),
+        "collect_applications": measure(env.collect_applications, repeat),
+        "create_static": measure(env.create_static, repeat),
+    }
+
+
+def bench_render(base_dir: pathlib.Path, modules: int, repeat: int) -> dict:
+    app = XtyleApp(base_dir, root="module-0", static_method=lambda url: f"/{url}")
+    urls = [f"module-{index % modules}/page" for index in range(repeat)]
+    start = time.perf_counter()
+    for url in urls:
+        app.render(url)
+    elapsed = time.perf_counter() - start
+    return {
+        "render": measure(lambda: app.render("module-0"), repeat),
+        "renders_per_second": len(urls) / elapsed if elapsed else None,
+    }
+
+
+def bench_storage(base_dir: pathlib.Path, components: int, repeat: int) -> dict:
+    environment_module.get_xtyle_declarations = lambda: ""
+    env = xtyle.Environment(base_dir=base_dir)
+    rows = [synthetic.component_row(random.Random(0), i) for i in range(components)]
+    modules = itertools.count()
+
+    def create_module():
+        # Every run inserts into an empty module
+        name = f"storage-{next(modules)}"
+        env.set("module", {"name": name, **env.sample_module()})
+        env.environment_module(name)
+        return name
+
+    def one_by_one(name):
+        for row in rows:
+            env.set("component", row, name)
+
+    repeat = max(3, repeat // 5)
+    output = {
+        "set": measure_each(create_module, one_by_one, repeat),
+        "bulk_set": measure_each(
+            create_module, lambda name: env.bulk_set("component", rows, name), repeat
+        ),
+    }
+    output["speedup"] = output["set"]["p50"] / output["bulk_set"]["p50"]
+
+    # Admin listing: every column against the listed ones
+    name = f"storage-{next(modules) - 1}"
+    output["all"] = measure(lambda: env.all("component", name), repeat)
+    output["rows_for_tables"] = measure(
+        lambda: env.rows_for_tables("component", name), repeat
+    )
+    return output
+
+
+def bench_client(host: str, repeat: int) -> dict:
+    component = COMPONENT
+    engines = {"local": xtyle.LocalClient(), "http": xtyle.client(host)}
+    output = {}
+    for name, engine in engines.items():
+        engine.component(**component)  # Warmup
+        output[f"{name}.minify"] = measure(lambda: engine.minify(SMALL_JS), repeat)
+        output[f"{name}.css"] = measure(lambda: engine.css(SMALL_SCSS), repeat)
+        output[f"{name}.component"] = measure(
+            lambda: engine.component(**component), repeat
+        )
+        output[f"{name}.plugin"] = measure(
+            lambda: engine.plugin("bench", [component] * 10), max(1, repeat // 10)
+        )
+        engine.close()
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Xtyle benchmark suite")
+    parser.add_argument("--modules", type=int, default=5)
+    parser.add_argument("--components", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--host", default=None, help="xtyle server (client bench)")
+    parser.add_argument(
+        "--only",
+        nargs="*",
+        default=["transforms", "environment", "render", "storage", "client"],
+    )
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "xtyle": metadata.version("xtyle"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "time": time.time(),
+            "modules": args.modules,
+            "components": args.components,
+            "repeat": args.repeat,
+        }
+    }
+
+    if "transforms" in args.only:
+        results["transforms"] = bench_transforms(args.repeat)
+
+    if "environment" in args.only or "render" in args.only:
+        with tempfile.TemporaryDirectory() as tmp, StandInServer() as server:
+            base_dir = pathlib.Path(tmp)
+            env, results["environment"] = bench_environment(
+                base_dir, server.url, args.modules, args.components, args.repeat
+            )
+            if "render" in args.only:
+                results["render"] = bench_render(base_dir, args.modules, args.repeat)
+
+    if "storage" in args.only:
+        with tempfile.TemporaryDirectory() as tmp:
+            results["storage"] = bench_storage(
+                pathlib.Path(tmp), args.components, args.repeat
+            )
+
+    if "client" in args.only:
+        if args.host:
+            results["client"] = bench_client(args.host, args.repeat)
+        else:
+            with StandInServer() as server:
+                results["client"] = bench_client(server.url, args.repeat)
+
+    summary = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(summary)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
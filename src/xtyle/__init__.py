@@ -1,14 +1,20 @@
 # Locals
-from .client import Client
+from .client import Client, AsyncClient
+from .local import LocalClient
 from .live_code import Environment, gzip, schema
-from .core import jsx, scss, prettier
+from .core import jsx, scss, prettier, warmup, configure_pool, pool_stats
+from .core import jsx_many, scss_many, prettier_many
+from .core import enable_cache, disable_cache, cache_stats
+from .cache import CompileCache
+from .executor import InlineExecutor, ProcessExecutor
 from .live_code.static import XtyleApp
 from .live_code.plugin_gzip import PluginGzip
+from . import aio
 
 
-def client(host="http://localhost:3000"):
+def client(host="http://localhost:3000", **kwargs):
     """Xtyle Client"""
-    return Client(host)
+    return Client(host, **kwargs)
 
 
 class App:
@@ -20,6 +26,7 @@ class App:
         rename: dict = None,
         debug: bool = False,
         xtyle_server: str = "http://localhost:3000",
+        storage_mode: str = "files",
     ):
         self._devs = False
 
@@ -27,6 +34,7 @@ class App:
             self._devs = Environment(
                 xtyle_client=Client(xtyle_server),
                 base_dir=root_path,
+                storage_mode=storage_mode,
             )
 
         # Core
@@ -73,7 +81,16 @@ class App:
             try:
                 match action_name:
                     case "all":
-                        response = admin.rows_for_tables(model, module_name)
+                        # Pagination (optional): offset & limit, or after (cursor)
+                        listing = input_data or {}
+                        page = {
+                            key: int(listing[key])
+                            for key in ("offset", "limit", "after")
+                            if listing.get(key) is not None
+                        }
+                        if listing.get("fields"):
+                            page["fields"] = listing["fields"]
+                        response = admin.rows_for_tables(model, module_name, **page)
                     case "set":
                         response = admin.set(model, input_data, module_name)
                     case "get":
@@ -0,0 +1,160 @@
+"""
+Module: Xtyle (asyncio)
+
+Awaitable versions of the transforms and the client, for ASGI apps.
+
+The engines (`babel`, `prettier`, `libsass`) and the HTTP calls run on a
+bounded thread pool, so the event loop keeps serving other requests while
+they work. `configure` sets the number of threads and of concurrent jobs.
+
+Usage:
+- `await xtyle.aio.jsx(code)`
+- `await xtyle.aio.client(host).component(**data)` (non-blocking with `httpx`)
+- `await xtyle.aio.run(env.cache_custom_module, "my-module")`
+"""
+
+# Python
+import asyncio
+import concurrent.futures
+import functools
+import os
+import weakref
+
+# Locals
+from . import core
+from .client import AsyncClient
+from .client import Client as SyncClient
+from .external_plugins import httpx_available
+
+MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+CONCURRENCY = MAX_WORKERS
+
+_executor = None
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def configure(max_workers: int = None, concurrency: int = None) -> None:
+    """
+    Configure the thread pool.
+
+    Args:
+        max_workers (int): Threads used to run the blocking work.
+        concurrency (int): Jobs allowed to run (or wait for a thread) at once.
+    """
+    global _executor, MAX_WORKERS, CONCURRENCY
+    if max_workers:
+        MAX_WORKERS = max_workers
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+    if concurrency:
+        CONCURRENCY = concurrency
+        _semaphores.clear()
+
+
+def get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=MAX_WORKERS,
+            thread_name_prefix="xtyle-aio",
+        )
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # One semaphore per event loop
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def run(method, *args, **kwargs):
+    """
+    Run a blocking method without blocking the event loop.
+
+    Args:
+        method: Any callable (e.g. `env.cache_custom_module`).
+        *args: Positional arguments of the method.
+        **kwargs: Keyword arguments of the method.
+
+    Returns:
+        The value returned by the method.
+    """
+    loop = asyncio.get_running_loop()
+    async with _get_semaphore():
+        return await loop.run_in_executor(
+            get_executor(), functools.partial(method, *args, **kwargs)
+        )
+
+
+async def jsx(code):
+    """JSX Render"""
+    return await run(core.jsx, code)
+
+
+async def scss(code):
+    """SCSS Render"""
+    return await run(core.scss, code)
+
+
+async def prettier(code, language=None):
+    """Prettier Language"""
+    return await run(core.prettier, code, language)
+
+
+async def jsx_many(codes: list) -> list:
+    """JSX Render (Batch)"""
+    return await run(core.jsx_many, codes)
+
+
+async def scss_many(codes: list, include_paths: list = None) -> list:
+    """SCSS Render (Batch)"""
+    return await run(core.scss_many, codes, include_paths)
+
+
+async def prettier_many(codes: list, language=None) -> list:
+    """Prettier Language (Batch)"""
+    return await run(core.prettier_many, codes, language)
+
+
+class Client:
+    """Awaitable `xtyle.Client`"""
+
+    def __init__(self, host: str = "http://localhost:3000", client=None):
+        self.sync = client or SyncClient(host)
+
+    @property
+    def host(self):
+        return self.sync.host
+
+    async def ping(self, **kwargs):
+        return await run(self.sync.ping, **kwargs)
+
+    async def tsx(self, code_string: str) -> str:
+        return await run(self.sync.tsx, code_string)
+
+    async def css(self, code_string: str) -> str:
+        return await run(self.sync.css, code_string)
+
+    async def minify(self, code_string: str) -> str:
+        return await run(self.sync.minify, code_string)
+
+    async def component(self, **kwargs) -> dict:
+        return await run(self.sync.component, **kwargs)
+
+    async def plugin(
+        self, name: str = None, components: list = None, install: dict = None
+    ) -> dict:
+        return await run(self.sync.plugin, name, components, install)
+
+
+def client(host="http://localhost:3000", **kwargs):
+    """Xtyle Client (asyncio)"""
+    if httpx_available:
+        return AsyncClient(host, **kwargs)
+    return Client(host)
@@ -0,0 +1,198 @@
+"""
+Content-addressed cache for compiled code.
+
+Entries are keyed by a hash of (tool, tool version, options, source) so a
+result is only reused when every input is the same. The memory tier is a LRU
+capped in bytes, the (optional) disk tier keeps one JSON file per entry and
+survives restarts.
+"""
+
+# Python
+import hashlib
+import json
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+
+
+def cache_key(tool: str, version: str, options, source) -> str:
+    """
+    Hash every input of a compilation.
+
+    Args:
+        tool (str): The tool name (`jsx`, `scss`, `prettier`, ...).
+        version (str): The tool version (or fingerprint).
+        options: JSON-serializable options of the call.
+        source: JSON-serializable source (code or payload).
+
+    Returns:
+        str: The hex digest of the inputs.
+    """
+    text = json.dumps(
+        [tool, version, options, source],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CompileCache:
+    """Memory (LRU) + disk cache of JSON-serializable values."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        path: str | pathlib.Path = None,
+        max_disk_bytes: int = None,
+    ):
+        self.max_bytes = max_bytes
+        self.path = pathlib.Path(path) if path else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if self.path:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the counters."""
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    def _file(self, key: str) -> pathlib.Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def _disk_files(self):
+        for file in self.path.glob("*/*.json"):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            yield file, stat.st_size, stat.st_mtime
+
+    def get(self, key: str):
+        """
+        Get a cached value.
+
+        Returns:
+            The value, or `None` when the key is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry[0]
+        if self.path:
+            try:
+                with open(self._file(key), "r", encoding="utf-8") as file:
+                    text = file.read()
+                value = json.loads(text)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(key, value, len(text.encode("utf-8")))
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value) -> None:
+        """Cache a (JSON-serializable) value."""
+        if value is None:
+            return
+        text = json.dumps(value, ensure_ascii=False)
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            self._remember(key, value, size)
+        if self.path:
+            self._write(key, text, size)
+
+    def _remember(self, key: str, value, size: int):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def _write(self, key: str, text: str, size: int):
+        file = self._file(key)
+        try:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            exists = file.exists()
+            tmp_file = file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_file, file)
+        except OSError:
+            return
+        if not exists:
+            with self._lock:
+                self._disk_bytes += size
+            if self.max_disk_bytes and self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        files = sorted(self._disk_files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * 0.9
+        for file, size, _ in files:
+            if total <= target:
+                break
+            try:
+                file.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self, disk: bool = True) -> None:
+        """Remove every entry (memory and, optionally, disk)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.path and disk:
+            for file, _, _ in list(self._disk_files()):
+                try:
+                    file.unlink()
+                except OSError:
+                    pass
+            with self._lock:
+                self._disk_bytes = 0
+
+    def stats(self) -> SimpleNamespace:
+        """Snapshot of the counters and sizes."""
+        with self._lock:
+            return SimpleNamespace(
+                hits=self.hits,
+                misses=self.misses,
+                memory_hits=self.memory_hits,
+                disk_hits=self.disk_hits,
+                evictions=self.evictions,
+                disk_evictions=self.disk_evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                disk_bytes=self._disk_bytes,
+            )
@@ -1,11 +1,184 @@
+import asyncio
+import concurrent.futures
 import json
+import threading
+import time
 from types import SimpleNamespace
-from .external_plugins import requests, requests_available
+from . import metrics
+from .cache import CompileCache, cache_key
+from .external_plugins import requests, httpx
+from .resilience import CircuitBreaker, Deadline, DeadlineExceeded, backoff
+
+# Safe to send twice (retries and hedged requests)
+IDEMPOTENT_PATHS = {"/ping", "/tsx", "/scss", "/minify"}
+
+# Responses worth another attempt
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Responses of a server that is down (a 500 may just be bad input)
+BREAKER_STATUS = {502, 503, 504}
+
+# Cache key version while `/ping` fails (asked again after `VERSION_RETRY` seconds)
+UNKNOWN_VERSION = "unknown"
+VERSION_RETRY = 60.0
+
+
+def response_code(response: SimpleNamespace) -> str:
+    return (
+        response.data.get("code", "")
+        if response.data and not response.error
+        else ""
+    )
+
+
+def component_payload(
+    name: str = None,
+    code: str = None,
+    props: str = None,
+    style: str = None,
+    docs: str = None,
+    theme: str = None,
+    **ignored,
+) -> dict:
+    return {
+        "name": name,
+        "code": code,
+        "props": props,
+        "style": style,
+        "docs": docs,
+        "theme": theme,
+    }
+
+
+def plugin_payload(
+    name: str = None,
+    components: list = None,
+    install: dict = None,
+    **ignored,
+) -> dict:
+    return {"name": name, "components": components, "install": install}
+
+
+class EndpointStats:
+    """Calls, errors, latency and bytes of one endpoint."""
+
+    __slots__ = ("count", "errors", "latency", "request_bytes", "response_bytes")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = {}
+        self.latency = metrics.Histogram()
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": dict(self.errors),
+            "latency": self.latency.snapshot(),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+        }
 
 
 class Client:
-    def __init__(self, host: str = "http://localhost:3000"):
+    def __init__(
+        self,
+        host: str = "http://localhost:3000",
+        pool_size: int = 10,
+        timeout: float | tuple = (5, 120),
+        batch_size: int = 100,
+        batch_bytes: int = 1024 * 1024,
+        cache: CompileCache | bool = None,
+        deadline: float = None,
+        retries: int = 2,
+        backoff: float = 0.1,
+        hedge: bool | float = False,
+        breaker_failures: int = 5,
+        breaker_reset: float = 30.0,
+        compress: str = None,
+        compress_min_bytes: int = 16 * 1024,
+        compress_level: int = 6,
+    ):
+        """
+        Xtyle (NodeJS) Server Client.
+
+        Args:
+            host (str): The server URL.
+            pool_size (int): Keep-alive connections kept open (per host).
+            timeout (float | tuple): Seconds, or `(connect, read)` seconds.
+            batch_size (int): Most components per `/components` request.
+            batch_bytes (int): Most (JSON) bytes per `/components` request.
+            cache (CompileCache | bool): Reuse responses (`True` for a memory cache).
+            deadline (float): Seconds per call, retries included (default: none).
+            retries (int): Extra attempts of idempotent calls (`/tsx`, `/scss`, `/minify`).
+            backoff (float): Base seconds between retries (exponential, jittered).
+            hedge (bool | float): Send a duplicate of a slow idempotent call after
+                the p95 latency (`True`) or after these seconds.
+            breaker_failures (int): Failures in a row (connection errors,
+                timeouts and 502/503/504) that open the circuit (`0`: never).
+            breaker_reset (float): Seconds before an open circuit tries again.
+            compress (str): Compress request bodies (`gzip` or `deflate`).
+            compress_min_bytes (int): Smallest (JSON) body worth compressing.
+            compress_level (int): Compression level (1 = fastest, 9 = smallest).
+        """
         self.host = host
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.batch_supported = None
+        self.cache = CompileCache() if cache is True else cache or None
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self.compress = compress
+        self.compress_min_bytes = compress_min_bytes
+        self.compress_level = compress_level
+        self.counters = dict.fromkeys(
+            ["retries", "hedges", "hedge_wins", "deadline_exceeded"], 0
+        )
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._hedge_executor = None
+        self._server_version = None
+        self._version_checked = 0.0
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Pooled (keep-alive) HTTP session, created on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.pool_size,
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def close(self):
+        """Close the pooled connections."""
+        with self._lock:
+            if self._hedge_executor is not None:
+                self._hedge_executor.shutdown(wait=False)
+                self._hedge_executor = None
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     def _handle_response(self, response):
         if response.status_code == 200:
@@ -13,31 +186,262 @@ class Client:
         else:
             return SimpleNamespace(data=None, error=response.status_code)
 
-    def post(self, path: str, data):
-        json_data = json.dumps(data)
-        headers = {"Content-Type": "application/json"}
-        response = requests.post(self.host + path, data=json_data, headers=headers)
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+        metrics.count(f"client.{name}")
+
+    def _record(
+        self, path: str, elapsed: float, sent: int, received: int, error=None
+    ) -> None:
+        with self._stats_lock:
+            stats = self._stats.get(path)
+            if stats is None:
+                stats = self._stats[path] = EndpointStats()
+            stats.count += 1
+            stats.latency.observe(elapsed)
+            stats.request_bytes += sent
+            stats.response_bytes += received
+            if error is not None:
+                stats.errors[error] = stats.errors.get(error, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        Per-endpoint snapshot (every attempt, retries and hedges included).
+
+        Returns:
+            dict: `{path: {count, errors, latency, request_bytes, response_bytes}}`,
+                `errors` by HTTP status (or exception name), `latency` in seconds
+                (`metrics.Histogram` snapshot), bytes as sent on the wire.
+        """
+        with self._stats_lock:
+            return {path: stats.snapshot() for path, stats in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        """Clear the endpoint stats and the counters."""
+        with self._stats_lock:
+            self._stats = {}
+        with self._lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+
+    def _attempt(self, path: str, body: bytes, headers: dict, deadline: Deadline):
+        timeout = deadline.timeout(self.timeout)
+        start = time.perf_counter()
+        try:
+            with metrics.span(f"client{path}"):
+                response = self.session.post(
+                    self.host + path,
+                    data=body,
+                    headers=headers,
+                    timeout=timeout,
+                )
+        except requests.RequestException as e:
+            elapsed = time.perf_counter() - start
+            self._record(path, elapsed, len(body), 0, type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - start
+        received = response.headers.get("Content-Length")
+        received = int(received) if received else len(response.content)
+        error = None if response.status_code == 200 else response.status_code
+        self._record(path, elapsed, len(body), received, error)
         return self._handle_response(response)
 
-    def typescript(self, path: str, data: str) -> str:
-        response = self.post(path, {"code": data})
-        return (
-            response.data.get("code", "")
-            if response.data and not response.error
-            else ""
-        )
+    def hedge_delay(self, path: str) -> float | None:
+        """Seconds before a duplicate request is sent (`None`: no hedging)."""
+        if self.hedge is True:
+            with self._stats_lock:
+                stats = self._stats.get(path)
+                latencies = sorted(stats.latency.samples) if stats else []
+            if len(latencies) >= 20:
+                return metrics.percentile(latencies, 95)
+            return None
+        return self.hedge or None
+
+    def _hedged(self, path: str, body: bytes, headers: dict, deadline: Deadline):
+        delay = self.hedge_delay(path)
+        if delay is None:
+            return self._attempt(path, body, headers, deadline)
+        if self._hedge_executor is None:
+            with self._lock:
+                if self._hedge_executor is None:
+                    self._hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.pool_size, thread_name_prefix="xtyle-hedge"
+                    )
+        executor = self._hedge_executor
+        first = executor.submit(self._attempt, path, body, headers, deadline)
+        try:
+            return first.result(timeout=min(delay, deadline.remaining() or delay))
+        except concurrent.futures.TimeoutError:
+            pass
+        self._count("hedges")
+        second = executor.submit(self._attempt, path, body, headers, deadline)
+        pending = {first, second}
+        error = None
+        try:
+            for future in concurrent.futures.as_completed(
+                pending, timeout=deadline.remaining()
+            ):
+                try:
+                    output = future.result()
+                except requests.RequestException as e:
+                    error = e
+                    continue
+                if future is second:
+                    self._count("hedge_wins")
+                return output
+        except concurrent.futures.TimeoutError:
+            raise DeadlineExceeded("xtyle: deadline exceeded")
+        raise error
+
+    def _encode(self, data) -> tuple:
+        body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip, deflate"}
+        if self.compress and len(body) >= self.compress_min_bytes:
+            # Lazy (`live_code` imports the client)
+            from .live_code.plugin_gzip import PluginGzip
+
+            body = PluginGzip.compress(body, self.compress, self.compress_level)
+            headers["Content-Encoding"] = self.compress
+        return body, headers
+
+    def post(self, path: str, data, deadline: float = None):
+        """
+        POST a JSON payload.
+
+        Idempotent paths are retried (connection errors, timeouts and 429/5xx)
+        and hedged. Every attempt and wait fits in the deadline.
+
+        Args:
+            path (str): The endpoint (`/minify`, `/component`, ...).
+            data: The JSON-serializable payload.
+            deadline (float): Seconds for the whole call (default: `self.deadline`).
+
+        Returns:
+            SimpleNamespace: `data` (JSON) and `error` (HTTP status).
+
+        Raises:
+            CircuitOpenError: The server keeps failing (no request was sent).
+            DeadlineExceeded: The deadline was reached.
+            requests.RequestException: The last attempt failed.
+        """
+        body, headers = self._encode(data)
+        deadline = Deadline(deadline if deadline is not None else self.deadline)
+        idempotent = path in IDEMPOTENT_PATHS
+        attempts = 1 + (self.retries if idempotent else 0)
+        send = self._hedged if idempotent and self.hedge else self._attempt
+        attempt = 0
+        while True:
+            self.breaker.check()
+            try:
+                output = send(path, body, headers, deadline)
+            except DeadlineExceeded:
+                self._count("deadline_exceeded")
+                self.breaker.failure()
+                raise
+            except requests.RequestException as e:
+                self.breaker.failure()
+                if not deadline.allows(0):
+                    self._count("deadline_exceeded")
+                    raise DeadlineExceeded("xtyle: deadline exceeded") from e
+                if not self._retry(attempt, attempts, deadline):
+                    raise
+                attempt += 1
+                continue
+            if output.error == 415 and "Content-Encoding" in headers:
+                # The server does not accept compressed bodies
+                self.compress = None
+                body, headers = self._encode(data)
+                continue
+            if output.error in BREAKER_STATUS:
+                self.breaker.failure()
+            else:
+                self.breaker.success()
+            if output.error in RETRY_STATUS:
+                if self._retry(attempt, attempts, deadline):
+                    attempt += 1
+                    continue
+            if output.error:
+                metrics.count(f"client{path}.errors")
+            return output
+
+    def _retry(self, attempt: int, attempts: int, deadline: Deadline) -> bool:
+        if attempt + 1 >= attempts:
+            return False
+        delay = backoff(attempt, self.backoff)
+        if not deadline.allows(delay):
+            return False
+        time.sleep(delay)
+        self._count("retries")
+        return True
+
+    @property
+    def server_version(self) -> str | None:
+        """Version reported by `/ping` (part of every cache key)."""
+        version = self._server_version
+        if version is None or (
+            version == UNKNOWN_VERSION
+            and time.monotonic() - self._version_checked >= VERSION_RETRY
+        ):
+            self.refresh_server_version()
+        return self._server_version
+
+    def refresh_server_version(self) -> str | None:
+        """Ask the server for its version, clear the cache when it changed."""
+        self._version_checked = time.monotonic()
+        try:
+            response = self.ping()
+        except requests.RequestException:
+            response = None
+        if not response or response.error or not isinstance(response.data, dict):
+            # No `/ping`: cache under `UNKNOWN_VERSION` instead of asking every call
+            if self._server_version is None:
+                self._server_version = UNKNOWN_VERSION
+            return None
+        version = response.data.get("version")
+        if version is None:
+            version = json.dumps(response.data, sort_keys=True)
+        version = str(version)
+        if self._server_version not in (None, version) and self.cache:
+            self.cache.clear()
+        self._server_version = version
+        return version
+
+    def invalidate_cache(self) -> None:
+        """Forget every cached response."""
+        if self.cache:
+            self.cache.clear()
+
+    def _cache_key(self, path: str, data) -> str | None:
+        if not self.cache:
+            return None
+        version = self.server_version
+        if version is None:
+            return None
+        return cache_key("client", version, path, data)
+
+    def typescript(self, path: str, data: str, deadline: float = None) -> str:
+        key = self._cache_key(path, data)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        response = self.post(path, {"code": data}, deadline=deadline)
+        output = response_code(response)
+        if key and response.data and not response.error:
+            self.cache.set(key, output)
+        return output
 
     def ping(self, **kwargs) -> SimpleNamespace:
         return self.post("/ping", kwargs)
 
-    def tsx(self, code_string: str) -> str:
-        return self.typescript("/tsx", code_string)
+    def tsx(self, code_string: str, deadline: float = None) -> str:
+        return self.typescript("/tsx", code_string, deadline)
 
-    def css(self, code_string: str) -> str:
-        return self.typescript("/scss", code_string)
+    def css(self, code_string: str, deadline: float = None) -> str:
+        return self.typescript("/scss", code_string, deadline)
 
-    def minify(self, code_string: str) -> str:
-        return self.typescript("/minify", code_string)
+    def minify(self, code_string: str, deadline: float = None) -> str:
+        return self.typescript("/minify", code_string, deadline)
 
     def component(
         self,
@@ -51,14 +455,7 @@ class Client:
     ) -> str:
         return self.typescript(
             "/component",
-            {
-                "name": name,
-                "code": code,
-                "props": props,
-                "style": style,
-                "docs": docs,
-                "theme": theme,
-            },
+            component_payload(name, code, props, style, docs, theme),
         )
 
     def plugin(
@@ -68,6 +465,195 @@ class Client:
         install: dict = None,
         **ignored,
     ) -> str:
-        return self.typescript(
-            "/plugin", {"name": name, "components": components, "install": install}
-        )
+        return self.typescript("/plugin", plugin_payload(name, components, install))
+
+    def _chunks(self, indexes: list, payloads: list) -> list:
+        chunks = []
+        chunk = []
+        chunk_bytes = 0
+        for index in indexes:
+            size = len(json.dumps(payloads[index]).encode("utf-8"))
+            if chunk and (
+                len(chunk) >= self.batch_size or chunk_bytes + size > self.batch_bytes
+            ):
+                chunks.append(chunk)
+                chunk = []
+                chunk_bytes = 0
+            chunk.append(index)
+            chunk_bytes += size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def components(self, components: list, theme: str = None) -> list:
+        """
+        Compile many components with a few `/components` requests.
+
+        Servers without the endpoint get one `/component` request per item.
+
+        Args:
+            components (list): Keyword arguments of `component` (one per item).
+            theme (str): Theme (module) name of every component.
+
+        Returns:
+            list: The compiled components, in order (`""` when one fails).
+        """
+        payloads = []
+        for item in components:
+            payload = component_payload(**item)
+            if theme:
+                payload["theme"] = theme
+            payloads.append(payload)
+        output = [None] * len(payloads)
+        keys = [self._cache_key("/component", item) for item in payloads]
+        missing = []
+        for index, key in enumerate(keys):
+            cached = self.cache.get(key) if key else None
+            if cached is None:
+                missing.append(index)
+            else:
+                output[index] = cached
+        for chunk in self._chunks(missing, payloads):
+            items = [payloads[index] for index in chunk]
+            if self.batch_supported is not False:
+                response = self.post("/components", {"code": items})
+                if response.error == 404:
+                    self.batch_supported = False
+                elif not response.error:
+                    self.batch_supported = True
+                    results = response_code(response)
+                    if isinstance(results, list) and len(results) == len(items):
+                        for index, result in zip(chunk, results):
+                            output[index] = result
+                            if keys[index]:
+                                self.cache.set(keys[index], result)
+                        continue
+                # Failed (or short) batch: one request per item
+            for index, item in zip(chunk, items):
+                output[index] = self.typescript("/component", item)
+        return output
+
+
+class AsyncClient:
+    def __init__(
+        self,
+        host: str = "http://localhost:3000",
+        pool_size: int = 10,
+        timeout: float | tuple = (5, 120),
+        concurrency: int = 10,
+    ):
+        """
+        Xtyle (NodeJS) Server Client (asyncio).
+
+        Use it from a single event loop (the connections belong to it).
+
+        Args:
+            host (str): The server URL.
+            pool_size (int): Connections shared by every call.
+            timeout (float | tuple): Seconds, or `(connect, read)` seconds.
+            concurrency (int): Requests in flight at once (the rest wait).
+        """
+        self.host = host
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._client = None
+        self._semaphore = None
+
+    @property
+    def client(self):
+        """Pooled (keep-alive) HTTP client, created on first use."""
+        if self._client is None:
+            if isinstance(self.timeout, tuple):
+                connect, read = self.timeout
+                timeout = httpx.Timeout(read, connect=connect)
+            else:
+                timeout = httpx.Timeout(self.timeout)
+            self._client = httpx.AsyncClient(
+                base_url=self.host,
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+            )
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def close(self):
+        """Close the pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def _handle_response(self, response):
+        if response.status_code == 200:
+            return SimpleNamespace(data=response.json(), error=None)
+        else:
+            return SimpleNamespace(data=None, error=response.status_code)
+
+    async def post(self, path: str, data):
+        json_data = json.dumps(data)
+        headers = {"Content-Type": "application/json"}
+        async with self.semaphore:
+            with metrics.span(f"client{path}"):
+                response = await self.client.post(
+                    path, content=json_data, headers=headers
+                )
+        output = self._handle_response(response)
+        if output.error:
+            metrics.count(f"client{path}.errors")
+        return output
+
+    async def typescript(self, path: str, data: str) -> str:
+        response = await self.post(path, {"code": data})
+        return response_code(response)
+
+    async def ping(self, **kwargs) -> SimpleNamespace:
+        return await self.post("/ping", kwargs)
+
+    async def tsx(self, code_string: str) -> str:
+        return await self.typescript("/tsx", code_string)
+
+    async def css(self, code_string: str) -> str:
+        return await self.typescript("/scss", code_string)
+
+    async def minify(self, code_string: str) -> str:
+        return await self.typescript("/minify", code_string)
+
+    async def component(self, **kwargs) -> str:
+        return await self.typescript("/component", component_payload(**kwargs))
+
+    async def plugin(
+        self,
+        name: str = None,
+        components: list = None,
+        install: dict = None,
+        **ignored,
+    ) -> str:
+        payload = plugin_payload(name, components, install)
+        return await self.typescript("/plugin", payload)
+
+    async def component_many(self, components: list, theme: str = None) -> list:
+        """
+        Compile many components concurrently (up to `concurrency` at once).
+
+        Returns:
+            list: The compiled components (in order).
+        """
+        calls = []
+        for item in components:
+            payload = {**item, "theme": theme} if theme else item
+            calls.append(self.component(**payload))
+        return await asyncio.gather(*calls)
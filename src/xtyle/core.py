@@ -6,16 +6,27 @@ Utilities for working with { Preact } components.
 Usage:
 - `xtyle.jsx` Render JSX String
 - `xtyle.scss` Render SCSS String
+- `xtyle.prettier` Format Code String
+- `xtyle.jsx_many` / `xtyle.scss_many` / `xtyle.prettier_many` Batch versions
+- `xtyle.warmup` Load the JavaScript engines ahead of time
+- `xtyle.configure_pool` Set how many contexts each engine may use
+- `xtyle.enable_cache` Reuse the output of unchanged sources
 """
 
 
 # Python
 import functools
+import hashlib
 import pathlib
+import threading
 from collections import namedtuple
+from types import SimpleNamespace
 
 # Extras
 from .external_plugins import MiniRacer, sass, sass_available, mini_racer_available
+from . import metrics
+from .cache import CompileCache, cache_key
+from .pool import ContextPool
 
 
 BASE_DIR = pathlib.Path(__file__).parent
@@ -25,64 +36,358 @@ engine = MiniRacer
 
 Javascript = namedtuple("JavascriptInPython", ["jsx", "prettier"], module="xtyle")
 
+# Files evaluated (in order) to build each tool's context
+ENGINE_FILES = {
+    "jsx": ["babel.min.js", "custom.js"],
+    "prettier": ["prettier-full.min.js", "custom.js"],
+}
 
-def initialize() -> functools.partial:
+# Javascript entry point of each tool
+ENGINE_FUNCTIONS = {
+    "jsx": "JSX",
+    "prettier": "prettyCode",
+}
+
+# Javascript entry point of each tool (batch)
+ENGINE_BATCH_FUNCTIONS = {
+    "jsx": "JSXMany",
+    "prettier": "prettyCodeMany",
+}
+
+# Contexts per tool (one thread per context at a time)
+POOL_SIZE = 1
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Compile cache (opt-in) and tool fingerprints
+_cache = None
+_versions = {}
+
+
+@functools.lru_cache(maxsize=None)
+def read_source(file_name: str) -> bytes:
     """
-    Initialize the MiniRacer compiler for JSX transformation.
+    Read one of the bundled Javascript files (once per process).
+
+    The UTF-8 bytes are kept, so every new context evaluates them without
+    reading, decoding or encoding ~5 MB of Javascript again.
+    """
+    with open(BASE_DIR / file_name, "rb") as file:
+        return file.read()
+
+
+def create_context(tool: str):
+    """
+    Create a MiniRacer context with the files of a single tool evaluated.
+
+    Args:
+        tool (str): The tool name (`jsx` or `prettier`).
 
     Returns:
-        functools.partial: A callable for JSX transformation.
+        MiniRacer: A ready to use context.
     """
-    if mini_racer_available:
-        ctx = MiniRacer()
+    ctx = MiniRacer()
+    for file_name in ENGINE_FILES[tool]:
+        ctx.eval(read_source(file_name))
+    return ctx
 
-        # Files
-        babel_path = BASE_DIR / "babel.min.js"
-        prettier_path = BASE_DIR / "prettier-full.min.js"
-        custom_path = BASE_DIR / "custom.js"
 
-        # Babel
-        with open(babel_path, "r", encoding="utf-8") as b_file:
-            babel_code = b_file.read()
+def get_pool(tool: str) -> ContextPool:
+    """
+    Get the context pool of a tool (contexts are created on first use).
 
-        # Prettier
-        with open(prettier_path, "r", encoding="utf-8") as p_file:
-            prettier_code = p_file.read()
+    Args:
+        tool (str): The tool name (`jsx` or `prettier`).
 
-        # Custom
-        with open(custom_path, "r", encoding="utf-8") as c_file:
-            custom_code = c_file.read()
+    Returns:
+        ContextPool: The pool of the tool.
+    """
+    pool = _pools.get(tool)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(tool)
+            if pool is None:
+                factory = functools.partial(create_context, tool)
+                pool = ContextPool(factory, size=POOL_SIZE)
+                _pools[tool] = pool
+    return pool
 
-        # Execute (babel.min.js & prettier.min.js)
-        ctx.eval(babel_code)
-        ctx.eval(prettier_code)
-        ctx.eval(custom_code)
 
+def get_engine(tool: str) -> functools.partial:
+    """
+    Get the callable of a tool, initializing its context on first use.
+
+    Args:
+        tool (str): The tool name (`jsx` or `prettier`).
+
+    Returns:
+        functools.partial: A callable for the tool.
+    """
+    return functools.partial(get_pool(tool).call, ENGINE_FUNCTIONS[tool])
+
+
+def configure_pool(size: int) -> None:
+    """
+    Set the maximum number of contexts per tool.
+
+    Args:
+        size (int): Contexts per tool (e.g. `os.cpu_count()` for bulk builds).
+    """
+    global POOL_SIZE
+    with _pools_lock:
+        POOL_SIZE = max(1, int(size))
+        for pool in _pools.values():
+            pool.resize(POOL_SIZE)
+
+
+def pool_stats() -> dict:
+    """Usage of every context pool created so far."""
+    return {tool: pool.stats() for tool, pool in _pools.items()}
+
+
+def initialize() -> Javascript:
+    """
+    Initialize the MiniRacer compilers for JSX transformation and formatting.
+
+    Returns:
+        Javascript: The callables for each tool.
+    """
+    if mini_racer_available:
         return Javascript(
-            jsx=functools.partial(ctx.call, "JSX"),
-            prettier=functools.partial(ctx.call, "prettyCode"),
+            jsx=get_engine("jsx"),
+            prettier=get_engine("prettier"),
         )
+    return None
+
+
+def warmup(*tools: str) -> None:
+    """
+    Load the JavaScript engines now instead of on the first call.
+
+    Every context of the pool is created, so none of the callers pays for it.
+
+    Args:
+        *tools (str): The tools to load (default: all of them).
+    """
+    if mini_racer_available:
+        for tool in tools or ENGINE_FILES.keys():
+            get_pool(tool).fill()
+
+
+def __getattr__(name):
+    # Backwards compatibility (`jsx_compile` used to be built on import)
+    if name == "jsx_compile":
+        return initialize()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def enable_cache(
+    max_bytes: int = 64 * 1024 * 1024,
+    path: str | pathlib.Path = None,
+    max_disk_bytes: int = None,
+) -> CompileCache:
+    """
+    Cache the output of `jsx`, `scss` and `prettier` (and their batch versions).
+
+    Args:
+        max_bytes (int): Size limit of the memory tier.
+        path (str | pathlib.Path): Folder of the disk tier (default: memory only).
+        max_disk_bytes (int): Size limit of the disk tier (default: unlimited).
+
+    Returns:
+        CompileCache: The active cache.
+    """
+    global _cache
+    _cache = CompileCache(max_bytes=max_bytes, path=path, max_disk_bytes=max_disk_bytes)
+    return _cache
 
 
-jsx_compile = initialize()
+def disable_cache() -> None:
+    """Stop caching (the disk tier is kept)."""
+    global _cache
+    _cache = None
 
 
+def cache_stats() -> SimpleNamespace | None:
+    """Hits, misses and evictions of the active cache."""
+    if _cache:
+        return _cache.stats()
+    return None
+
+
+def tool_version(tool: str) -> str:
+    """
+    Fingerprint of a tool, part of every cache key.
+
+    Args:
+        tool (str): The tool name (`jsx`, `prettier` or `scss`).
+
+    Returns:
+        str: A hash of the engine files (or the libsass version).
+    """
+    version = _versions.get(tool)
+    if version is None:
+        if tool == "scss":
+            version = f"libsass-{getattr(sass, 'libsass_version', '')}"
+        else:
+            digest = hashlib.sha1()
+            for file_name in ENGINE_FILES[tool]:
+                digest.update(read_source(file_name))
+            version = digest.hexdigest()
+        _versions[tool] = version
+    return version
+
+
+def _cached(tool: str, options, code: str, compute):
+    if _cache is None:
+        return compute(code)
+    key = cache_key(tool, tool_version(tool), options, code)
+    value = _cache.get(key)
+    if value is None:
+        value = compute(code)
+        _cache.set(key, value)
+    return value
+
+
+def _cached_many(tool: str, options, codes: list, compute_many) -> list:
+    if _cache is None:
+        return compute_many(codes)
+    version = tool_version(tool)
+    keys = [cache_key(tool, version, options, code) for code in codes]
+    output = [None] * len(codes)
+    missing = []
+    for index, key in enumerate(keys):
+        value = _cache.get(key)
+        if value is None:
+            missing.append(index)
+        else:
+            output[index] = SimpleNamespace(data=value, error=None)
+    if missing:
+        computed = compute_many([codes[index] for index in missing])
+        for index, item in zip(missing, computed):
+            output[index] = item
+            if item.error is None:
+                _cache.set(keys[index], item.data)
+    return output
+
+
+@metrics.timed("core.prettier")
 def prettier(code, language=None):
     """Prettier Language"""
     if mini_racer_available:
-        return jsx_compile.prettier(code, language)
+        compute = functools.partial(_prettier, language=language)
+        return _cached("prettier", language, code, compute)
     return code
 
 
+@metrics.timed("core.jsx")
 def jsx(code):
     """JSX Render"""
     if mini_racer_available:
-        return jsx_compile.jsx(code)
+        return _cached("jsx", None, code, get_engine("jsx"))
     return code
 
 
+@metrics.timed("core.scss")
 def scss(code):
     """SCSS Render"""
     if sass_available:
-        return sass.compile(string=code, output_style="compressed")
+        return _cached("scss", "compressed", code, _scss)
     return code
+
+
+def _prettier(code, language=None):
+    return get_engine("prettier")(code, language)
+
+
+def _scss(code, **options):
+    return sass.compile(string=code, output_style="compressed", **options)
+
+
+def _batch_output(items: list) -> list:
+    return [SimpleNamespace(data=item["data"], error=item["error"]) for item in items]
+
+
+def _batch_skipped(codes: list) -> list:
+    return [SimpleNamespace(data=code, error=None) for code in codes]
+
+
+def _prettier_many(codes: list, language=None) -> list:
+    items = [[code, language] for code in codes]
+    output = get_pool("prettier").call(ENGINE_BATCH_FUNCTIONS["prettier"], items)
+    return _batch_output(output)
+
+
+def _jsx_many(codes: list) -> list:
+    output = get_pool("jsx").call(ENGINE_BATCH_FUNCTIONS["jsx"], codes)
+    return _batch_output(output)
+
+
+def _scss_many(codes: list, **options) -> list:
+    output = []
+    for code in codes:
+        try:
+            output.append(SimpleNamespace(data=_scss(code, **options), error=None))
+        except Exception as e:
+            # Any libsass failure fails this item only
+            output.append(SimpleNamespace(data=None, error=str(e)))
+    return output
+
+
+@metrics.timed("core.prettier_many")
+def prettier_many(codes: list, language=None) -> list:
+    """
+    Prettier Language (Batch)
+
+    Args:
+        codes (list): The source codes.
+        language (str): The language of every code.
+
+    Returns:
+        list: One `SimpleNamespace(data, error)` per code (in order).
+    """
+    codes = list(codes)
+    if mini_racer_available:
+        compute = functools.partial(_prettier_many, language=language)
+        return _cached_many("prettier", language, codes, compute)
+    return _batch_skipped(codes)
+
+
+@metrics.timed("core.jsx_many")
+def jsx_many(codes: list) -> list:
+    """
+    JSX Render (Batch)
+
+    Args:
+        codes (list): The source codes.
+
+    Returns:
+        list: One `SimpleNamespace(data, error)` per code (in order).
+    """
+    codes = list(codes)
+    if mini_racer_available:
+        return _cached_many("jsx", None, codes, _jsx_many)
+    return _batch_skipped(codes)
+
+
+@metrics.timed("core.scss_many")
+def scss_many(codes: list, include_paths: list = None) -> list:
+    """
+    SCSS Render (Batch)
+
+    Args:
+        codes (list): The source codes.
+        include_paths (list): Folders used by `@import` (shared by every code).
+
+    Returns:
+        list: One `SimpleNamespace(data, error)` per code (in order).
+    """
+    codes = list(codes)
+    if not sass_available:
+        return _batch_skipped(codes)
+    if include_paths:
+        # Imported files are not part of the cache key
+        paths = [str(path) for path in include_paths]
+        return _scss_many(codes, include_paths=paths)
+    return _cached_many("scss", "compressed", codes, _scss_many)
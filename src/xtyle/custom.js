@@ -77,3 +77,78 @@ var prettyCode = (function () {
 
   return prettyCode;
 })();
+
+/* Batch (one call for many items, errors are reported per item) */
+var batchCall = (method, items) =>
+  items.map((args) => {
+    try {
+      return { data: method(...args), error: null };
+    } catch (e) {
+      return { data: null, error: String(e) };
+    }
+  });
+
+var JSXMany = (codes) =>
+  batchCall(
+    (code) =>
+      Babel.transform(code, { presets: ["react"] }).code.replace(
+        /\/\*\#\_\_PURE\_\_\*\/\s*React\.createElement/g,
+        "h"
+      ),
+    codes.map((code) => [code])
+  );
+
+var prettyCodeMany = (items) => batchCall(prettyCode, items);
+
+/* Local Client (same output shapes as the xtyle server) */
+var toH = (code) =>
+  code
+    .replace(/\/\*\#\_\_PURE\_\_\*\/\s*React\.createElement/g, "h")
+    .replace(/React\.createElement/g, "h");
+
+var TSX = (code, minified = false) =>
+  toH(
+    Babel.transform(code, {
+      filename: "component.tsx",
+      presets: ["typescript", ["react", { useSpread: true }]],
+      minified: minified,
+      comments: !minified,
+    }).code
+  );
+
+var minifyCode = (code) =>
+  Babel.transform(code, { minified: true, comments: false }).code;
+
+var componentFunction = (name, code) => {
+  code = (code || "").trim();
+  if (/^export\s+default\s+function\b/.test(code)) {
+    // Only the component: inline its name
+    return code
+      .replace(/\$NAME\b/g, JSON.stringify(name))
+      .replace(/export\s+default\s+function\s*[\w$]*/, "function");
+  }
+  // Helpers or its own `$NAME`: keep them in a scope
+  const declared = /\b(?:const|let|var)\s+\$NAME\b/.test(code);
+  const scope = declared ? "" : `const $NAME = ${JSON.stringify(name)};`;
+  const body = code.replace(/export\s+default\s+/, "return ");
+  return `(function () { ${scope}\n${body}\n})()`;
+};
+
+var buildComponent = (name, code) =>
+  TSX(`const ${name} = ${componentFunction(name, code)};`, true);
+
+var installValue = (code) =>
+  code
+    ? `(${code.replace(/export\s+default\s+/, "").trim().replace(/;$/, "")})`
+    : "void 0";
+
+var buildPlugin = (name, components, install) => {
+  const members = components.map(
+    (item) => `${item.name}: ${componentFunction(item.name, item.code)}`
+  );
+  const values = ["init", "store", "globals", "directives"].map(
+    (key) => `${key}: ${installValue((install || {})[key])}`
+  );
+  members.push(`install: function () { return { ${values.join(", ")} }; }`);
+  return TSX(`var ${name} = { ${members.join(", ")} };`, true);
+};
@@ -0,0 +1,137 @@
+"""
+Executors for transform jobs (`jsx`, `scss` and `prettier`).
+
+- `InlineExecutor` runs every job in the current process.
+- `ProcessExecutor` fans batches of jobs out to worker processes, each
+  worker loads the engines it uses once (on its first job, or at start for
+  the `tools` given) and then receives whole batches.
+
+Both return the results in the same order as the sources.
+"""
+
+# Python
+import concurrent.futures
+import os
+
+# Locals
+from . import core
+
+BATCH_METHODS = {
+    "jsx": core.jsx_many,
+    "scss": core.scss_many,
+    "prettier": core.prettier_many,
+}
+
+
+def run_batch(tool: str, codes: list, options: dict = None) -> list:
+    """
+    Run one batch of a tool.
+
+    Args:
+        tool (str): The tool name (`jsx`, `scss` or `prettier`).
+        codes (list): The source codes.
+        options (dict): Keyword arguments of the batch method.
+
+    Returns:
+        list: One `SimpleNamespace(data, error)` per code (in order).
+    """
+    return BATCH_METHODS[tool](codes, **(options or {}))
+
+
+def _init_worker(tools: tuple):
+    # Load the engines once per worker (`warmup()` alone loads all of them)
+    engines = [tool for tool in tools if tool in core.ENGINE_FILES]
+    if engines:
+        core.warmup(*engines)
+
+
+class InlineExecutor:
+    """Run the jobs in the current process."""
+
+    workers = 0
+
+    def map(self, tool: str, codes: list, **options) -> list:
+        """Transform every code with the tool (in order)."""
+        codes = list(codes)
+        if not codes:
+            return []
+        return run_batch(tool, codes, options)
+
+    def close(self):
+        """Nothing to release."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ProcessExecutor(InlineExecutor):
+    """
+    Run the jobs in a pool of worker processes.
+
+    Engines load lazily on the first job of each tool. `tools` (e.g.
+    `("jsx",)`) loads them when a worker starts instead.
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        chunk_size: int = 32,
+        tools: tuple = (),
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.tools = tuple(tools)
+        self._pool = None
+
+    @property
+    def pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.tools,),
+            )
+        return self._pool
+
+    def _chunks(self, codes: list) -> list:
+        # Smaller chunks when there are few codes, so every worker gets some
+        size = min(self.chunk_size, max(1, -(-len(codes) // self.workers)))
+        return [codes[index : index + size] for index in range(0, len(codes), size)]
+
+    def map(self, tool: str, codes: list, **options) -> list:
+        """Transform every code with the tool (in order)."""
+        codes = list(codes)
+        if not codes:
+            return []
+        futures = [
+            self.pool.submit(run_batch, tool, chunk, options)
+            for chunk in self._chunks(codes)
+        ]
+        output = []
+        for future in futures:
+            output.extend(future.result())
+        return output
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def get_executor(workers: int = None) -> InlineExecutor:
+    """
+    Get an executor for the number of workers.
+
+    Args:
+        workers (int): Worker processes (`0` or `1` runs inline).
+
+    Returns:
+        InlineExecutor | ProcessExecutor: The executor.
+    """
+    if workers is not None and workers <= 1:
+        return InlineExecutor()
+    return ProcessExecutor(workers=workers)
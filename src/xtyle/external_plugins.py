@@ -24,11 +24,31 @@ except ImportError:
     requests = None
     requests_available = False
 
+# HTTPX (asyncio)
+try:
+    import httpx
+    httpx_available = True
+except ImportError:
+    httpx = None
+    httpx_available = False
+
 # SQLow
 try:
-    from sqlow import sqlow
+    from sqlow import (
+        sqlow,
+        SQLowDatabase,
+        PreDefinedClass,
+        Value,
+        decorator_config,
+        slugify,
+    )
     sqlow_available = True
 except ImportError:
     sqlow = None
+    SQLowDatabase = object
+    PreDefinedClass = None
+    Value = None
+    decorator_config = None
+    slugify = None
     sqlow_available = False
 
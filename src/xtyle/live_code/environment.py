@@ -1,5 +1,8 @@
+import asyncio
+import contextlib
 import os
 import shutil
+import threading
 import time
 import uuid
 import pathlib
@@ -9,10 +12,14 @@ from types import SimpleNamespace
 
 from markupsafe import Markup
 
-from ..core import scss
-from ..external_plugins import sqlow, sqlow_available
+from .. import metrics
+from ..core import enable_cache
+from ..client import AsyncClient, Client
+from ..executor import InlineExecutor
+from ..external_plugins import httpx_available
 from .get_xtyle import get_xtyle_declarations
 
+from . import storage
 from .esmodules import ESModuleBuilder
 from .sample import templates_tools
 from .typescript_tools import parse_type, jinja_render
@@ -68,13 +75,18 @@ export default {
 """
 
 
-def process_scss(code):
-    if code:
-        try:
-            return scss(code)
-        except:
-            pass
-    return code or ""
+def process_scss_many(codes: list, executor=None) -> list:
+    executor = executor or InlineExecutor()
+    codes = [code or "" for code in codes]
+    compiled = iter(executor.map("scss", [code for code in codes if code]))
+    output = []
+    for code in codes:
+        if code:
+            item = next(compiled)
+            output.append(code if item.error else item.data)
+        else:
+            output.append("")
+    return output
 
 
 def generate_unique_id():
@@ -111,12 +123,23 @@ class XtyleEnvironment:
         static_method=None,
         reverse_method=None,
         xtyle_client=None,
+        compile_cache: bool = False,
+        executor=None,
+        xtyle_concurrency: int = 1,
+        storage_mode: str = "files",
+        journal_mode: str = "wal",
+        busy_timeout: float = 5.0,
+        synchronous: str = "normal",
     ):
         # Environment Folder
         env_dir = base_dir / ".xtyle_db"
 
         # Connects to NodeJS Server
         self.xtyle_client = xtyle_client
+        self.xtyle_concurrency = xtyle_concurrency
+
+        # Runs (SCSS) Transforms (Inline or Worker Processes)
+        self.executor = executor or InlineExecutor()
 
         # Core Paths
         self.base_dir = base_dir
@@ -127,8 +150,10 @@ class XtyleEnvironment:
         self.path_env_dir = env_dir
         self.path_env_core_database = env_dir / "xtyle.sqlite3"
         self.path_env_databases_dir = env_dir / ".xtyle"
+        self.path_env_modules_database = env_dir / "modules.sqlite3"
         self.path_env_exports_dir = env_dir / "exports"
         self.path_env_tmp_dir = env_dir / ".tmp"
+        self.path_env_cache_dir = env_dir / "cache"
 
         # ESBuilder
         self.esmodule = ESModuleBuilder(self.path_env_exports_dir)
@@ -136,9 +161,30 @@ class XtyleEnvironment:
         # Base Html
         self.base_html = self.templates_dir / "base.html"
 
+        # Module Rows: One File Per Module ("files") or One Shared File ("single")
+        if storage_mode not in ("files", "single"):
+            raise ValueError(f"Unknown storage mode: {storage_mode}")
+        self.storage_mode = storage_mode
+
+        # SQLite Settings (WAL: readers do not wait for a rebuild)
+        self.pragmas = storage.Pragmas(
+            journal_mode=journal_mode,
+            busy_timeout=busy_timeout,
+            synchronous=synchronous,
+        )
+
+        # Module Tables (per module name) and Module IDs (per module name)
+        self._modules = {}
+        self._module_ids = {}
+        self._modules_lock = threading.Lock()
+
         self._init_folders()
         self._init_environment()
 
+        # Compile Cache (jsx, scss & prettier)
+        if compile_cache:
+            enable_cache(path=self.path_env_cache_dir)
+
         self.jinja = Template(
             self.templates_dir,
             static_method=static_method,
@@ -179,19 +225,45 @@ class XtyleEnvironment:
                 current.mkdir(parents=True, exist_ok=True)
 
     def environment_module(self, name: str):
-        database = sqlow(self._module_database_path(name))
-        table = lambda model: database()(model)()
-        return Theme(
-            component=table(Component),
-            view=table(View),
-            plugin=table(Plugin),
-            style=table(Style),
-        )
+        theme = self._modules.get(name)
+        if theme is None:
+            with self._modules_lock:
+                theme = self._modules.get(name)
+                if theme is None:
+                    if self.storage_mode == "single":
+                        database = self.path_env_modules_database
+                        module_id = self._module_id(name)
+                        table = lambda model: storage.scoped_table(
+                            database, model, module_id, self.pragmas
+                        )
+                    else:
+                        database = self._module_database_path(name)
+                        table = lambda model: storage.table(
+                            database, model, self.pragmas
+                        )
+                    theme = Theme(
+                        component=table(Component),
+                        view=table(View),
+                        plugin=table(Plugin),
+                        style=table(Style),
+                    )
+                    self._modules[name] = theme
+        return theme
+
+    def invalidate_modules(self, name: str = None):
+        """Forget the cached tables and ID of a module (default: every module)."""
+        with self._modules_lock:
+            if name is None:
+                self._modules.clear()
+                self._module_ids.clear()
+            else:
+                self._modules.pop(name, None)
+                self._module_ids.pop(name, None)
 
     def _init_environment(self):
         # Main Database
-        database = sqlow(self.path_env_core_database)
-        table = lambda model: database()(model)()
+        database = self.path_env_core_database
+        table = lambda model: storage.table(database, model, self.pragmas)
         self.environment = Environment(
             base=table(Base),
             cache=table(Cache),
@@ -240,11 +312,64 @@ class XtyleEnvironment:
         try:
             table = self._get_table(model, module=module)
             table.set(**data)
+            if model == "module" and not module:
+                self.invalidate_modules()
             return True
         except Exception as e:
             print(e)
+            if storage.in_transaction():
+                # Roll the whole block back (see `transaction`)
+                raise
             return False
 
+    def bulk_set(self, model: str, rows: list, module=None):
+        """
+        `set` many rows in one transaction (all of them, or none).
+
+        Args:
+            model (str): The model (e.g. `component`).
+            rows (list): The rows (`dict`).
+            module (str): The module (`None` for the environment tables).
+        """
+        outer = storage.in_transaction()
+        try:
+            with self.transaction():
+                table = self._get_table(model, module=module)
+                for data in rows:
+                    table.set(**data)
+        except Exception as e:
+            print(e)
+            if outer:
+                # Part of a larger block: roll all of it back
+                raise
+            self.invalidate_modules()
+            return False
+        if model == "module" and not module:
+            self.invalidate_modules()
+        return True
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Writes of the block commit once, or roll back on an exception.
+
+        Inside the block `set`, `bulk_set`, `rename`, `delete` and `drop`
+        raise (instead of returning `False`), so a failed write rolls back
+        every write of the block.
+
+        Usage:
+            with env.transaction():
+                env.set("component", {...}, "my-module")
+                env.set("view", {...}, "my-module")
+        """
+        try:
+            with storage.transaction():
+                yield
+        except BaseException:
+            # Module IDs (and tables) created in the block were rolled back
+            self.invalidate_modules()
+            raise
+
     def rename(self, model: str, data: dict, module=None):
         data_old = data.get("old")
         data_new = data.get("new")
@@ -252,10 +377,13 @@ class XtyleEnvironment:
             try:
                 table = self._get_table(model, module=module)
                 table.rename(data_old, data_new)
+                if model == "module" and not module:
+                    self.invalidate_modules()
                 return True
             except Exception as e:
                 print(e)
-                pass
+                if storage.in_transaction():
+                    raise
         return False
 
     def delete(self, model: str, name: str, module=None):
@@ -267,40 +395,66 @@ class XtyleEnvironment:
         try:
             table = self._get_table(model, module=module)
             table.delete(name=name)
+            if model == "module" and not module:
+                self.invalidate_modules(name)
             return True
         except Exception as e:
             print(e)
-            pass
-
+            if storage.in_transaction():
+                raise
         return False
 
     def drop(self, model: str, module=None):
         try:
             table = self._get_table(model, module=module)
             table.drop()
+            if module:
+                self.invalidate_modules(module)
+            elif model == "module":
+                self.invalidate_modules()
             return True
         except Exception as e:
             print(e)
-            pass
+            if storage.in_transaction():
+                raise
         return False
 
     def destroy(self, module: str = None):
+        if module and self.storage_mode == "single":
+            for table in self.environment_module(module):
+                table.delete_all()
+            self.invalidate_modules(module)
+            return True
         try:
             if module:
                 file_path = self._module_database_path(module)
+                self.invalidate_modules(module)
             else:
-                file_path = self.env_database_file
+                file_path = self.path_env_core_database
+                self.invalidate_modules()
             # Remove
-            os.remove(file_path)
+            storage.remove_database(file_path)
             return True
         except OSError as e:
             return False
 
     def clone_module(self, src: str, dst: str):
+        if self.storage_mode == "single":
+            source = self.environment_module(src)
+            target = self.environment_module(dst)
+            with self.transaction():
+                for src_table, dst_table in zip(source, target):
+                    dst_table.delete_all()
+                    for row in src_table.all():
+                        row.pop("id", None)
+                        dst_table.insert(**row)
+            self.invalidate_modules(dst)
+            return True
         try:
             src_path = self._module_database_path(src)
             dst_path = self._module_database_path(dst)
-            shutil.copy2(src_path, dst_path)
+            storage.copy_database(src_path, dst_path)
+            self.invalidate_modules(dst)
             return True
         except OSError as e:
             return False
@@ -318,14 +472,58 @@ class XtyleEnvironment:
                 return updated_dict
         return None
 
-    def _module_database_path(self, name: str):
-        model = self.env.module.get_by(name=name)
+    def migrate_storage(self, remove_files: bool = False) -> dict:
+        """
+        Copy the rows of the per-module files into the single-file storage.
+
+        Rows already in the single file (same module and name) are kept.
 
-        if not model:
-            self.env.module.set(name=name)
+        Args:
+            remove_files (bool): Delete the per-module files once copied.
+
+        Returns:
+            dict: Rows copied per module name.
+        """
+        if self.storage_mode != "single":
+            raise ValueError('Migrating requires storage_mode="single"')
+        copied = {}
+        for row in self.environment.module.all():
+            name = row.get("name")
+            file_path = self.path_env_databases_dir / f"{row.get('id')}.sqlite3"
+            if not file_path.exists():
+                continue
+            target = self.environment_module(name)
+            count = 0
+            with self.transaction():
+                for model, dst_table in zip(Theme._fields, target):
+                    model_class = getattr(schema, model)
+                    src_table = storage.table(file_path, model_class, self.pragmas)
+                    existing = {item.get("name") for item in dst_table.all()}
+                    for item in src_table.all():
+                        if item.get("name") not in existing:
+                            item.pop("id", None)
+                            dst_table.insert(**item)
+                            count += 1
+            copied[name] = count
+            if remove_files:
+                storage.remove_database(file_path)
+        return copied
+
+    def _module_id(self, name: str):
+        db_id = self._module_ids.get(name)
+        if db_id is None:
             model = self.env.module.get_by(name=name)
 
-        db_id = model.get("id")
+            if not model:
+                self.env.module.set(name=name)
+                model = self.env.module.get_by(name=name)
+
+            db_id = model.get("id")
+            self._module_ids[name] = db_id
+        return db_id
+
+    def _module_database_path(self, name: str):
+        db_id = self._module_id(name)
         return self.path_env_databases_dir / f"{db_id}.sqlite3"
 
     def _get_table(self, model: str, module=None):
@@ -333,8 +531,6 @@ class XtyleEnvironment:
             db = self.env._asdict()
             table = db.get(model)
         else:
-            if not self.env.module.get(module):
-                self.env.module.set(name=module)
             db = self.environment_module(module)._asdict()
             table = db.get(model)
         return table
@@ -394,10 +590,11 @@ class XtyleEnvironment:
         )
         return lambda code_props: jinja_render(code_props or "", **all_props)
 
-    def build_module(self, package_name):
+    @metrics.timed("environment.build_module")
+    def build_module(self, package_name, styles: list = None):
         the_plugin = self.build_components(package_name)
         if the_plugin:
-            the_styles = self.build_styles(package_name, the_plugin.style)
+            the_styles = self.build_styles(package_name, the_plugin.style, styles)
 
             return SimpleNamespace(
                 name=package_name,
@@ -407,14 +604,35 @@ class XtyleEnvironment:
             )
         return None
 
-    def build_styles(self, package_name, components_style: str = None):
-        # TODO
-        styles = self.all("style", package_name)
-        final_style = "\n".join([process_scss(x.get("code")) for x in styles])
+    @metrics.timed("environment.build_styles")
+    def build_styles(
+        self, package_name, components_style: str = None, styles: list = None
+    ):
+        if styles is None:
+            codes = [x.get("code") for x in self.all("style", package_name)]
+            styles = process_scss_many(codes, self.executor)
+        final_style = "\n".join(styles)
         if self.xtyle_client:
             return self.xtyle_client.css(final_style + (components_style or ""))
         return final_style
 
+    @metrics.timed("environment.build_all_styles")
+    def build_all_styles(self, package_names: list) -> dict:
+        codes = []
+        sizes = []
+        for package_name in package_names:
+            styles = self.all("style", package_name)
+            codes.extend([x.get("code") for x in styles])
+            sizes.append(len(styles))
+        compiled = process_scss_many(codes, self.executor)
+        output = {}
+        start = 0
+        for package_name, size in zip(package_names, sizes):
+            output[package_name] = compiled[start : start + size]
+            start += size
+        return output
+
+    @metrics.timed("environment.build_views")
     def build_views(self, package_name):
         self.global_props_types()
         _components_list = self.all("view", package_name)
@@ -455,6 +673,7 @@ class XtyleEnvironment:
                     )
         return None
 
+    @metrics.timed("environment.build_components")
     def build_components(self, package_name):
         self.global_props_types()
         module_dict = self.environment.module.get_by(name=package_name)
@@ -509,16 +728,35 @@ class XtyleEnvironment:
             "this": f"{package_name}.{component_name}",
         }
 
-    def cache_custom_module(self, package_name):
-        module_dict = self.get("module", package_name)
+    @metrics.timed("environment.cache_custom_module")
+    def cache_custom_module(
+        self,
+        package_name,
+        styles: list = None,
+        module_dict: dict = None,
+        cached: dict = None,
+    ):
+        """
+        Build a module and save it in the `cache` table.
+
+        Args:
+            package_name (str): The module.
+            styles (list): Its compiled styles (see `build_all_styles`).
+            module_dict (dict): Its `module` row (when the caller has it).
+            cached (dict): Prefetched `cache` rows (`cache.get_many`).
+        """
+        module_dict = module_dict or self.get("module", package_name)
         module_name = str(module_dict.get("id"))
 
-        my_plugin = self.build_module(package_name)
+        my_plugin = self.build_module(package_name, styles)
         my_views = self.build_views(package_name)
         data_dict = {}
         if my_plugin:
             data_dict = {"name": module_name, "build_id": 0}
-            found = self.environment.cache.get_by(name=module_name)
+            if cached is None:
+                found = self.environment.cache.get_by(name=module_name)
+            else:
+                found = cached.get(module_name)
             if found:
                 data_dict.update(found)
                 data_dict["build_id"] = data_dict.get("build_id", 0)
@@ -668,11 +906,37 @@ class XtyleEnvironment:
         model,
         module_name=None,
         fields=["id", "name", "path", "label", "language", "version"],
+        offset: int = None,
+        limit: int = None,
+        after: int = None,
     ):
-        output = []
-        for item in self.all(model, module_name):
-            output.append({k: v for k, v in item.items() if k in fields})
-        return output
+        """
+        The admin listing of a table (only `fields` are read, not the code).
+
+        Args:
+            model (str): The model (e.g. `component`).
+            module_name (str): The module (`None` for the environment tables).
+            fields (list): The columns.
+            offset (int): Rows to skip.
+            limit (int): Rows per page.
+            after (int): Cursor, rows after this `id` (see `next`).
+
+        Returns:
+            list | dict: The rows, or with pagination (`offset`, `limit` or
+                `after`) `{"rows", "total", "offset", "limit", "next"}`.
+        """
+        table = self._get_table(model, module=module_name)
+        rows, last_id = table.page(fields, offset=offset, limit=limit, after=after)
+        if offset is None and limit is None and after is None:
+            return rows
+        more = limit is not None and len(rows) == limit
+        return {
+            "rows": rows,
+            "total": table.count(),
+            "offset": offset or 0,
+            "limit": limit,
+            "next": last_id if more else None,
+        }
 
     @property
     def init_template(self):
@@ -723,6 +987,7 @@ class XtyleEnvironment:
             final_obj.style = None
         return final_obj
 
+    @metrics.timed("environment._collect_applications")
     def _collect_applications(self):
         apps_dict = {}
         self.cache_environment_declarations()
@@ -731,14 +996,27 @@ class XtyleEnvironment:
         # Get Plugins
         plugins_obj = self.collect_plugins()
 
+        # Compile The Styles Of Every Module At Once
+        all_modules = self.environment.module.all()
+        all_styles = self.build_all_styles([row.get("name") for row in all_modules])
+
+        # Build (one query for the cache rows of every module)
+        cache_names = [str(row.get("id")) for row in all_modules]
+        cached = self.environment.cache.get_many(cache_names)
+        for row in all_modules:
+            app_name = row.get("name")
+            self.cache_custom_module(
+                app_name, all_styles.get(app_name), module_dict=row, cached=cached
+            )
+        cached = self.environment.cache.get_many(cache_names)
+
         # Get Apps
-        for row in self.environment.module.all():
+        for row in all_modules:
             app_id = row.get("id")
             app_name = row.get("name")
             jinja_base_id = row.get("base_id", 0)
-            self.cache_custom_module(app_name)
             # ['module', 'views', 'plugins', 'declarations', 'build_id', 'id', 'name']
-            found = self.environment.cache.get_by(name=str(app_id))
+            found = cached.get(str(app_id)) or {}
             the_components = found.get("module", {}) or {}
             the_views = found.get("views", {}) or {}
             if found:
@@ -764,6 +1042,7 @@ class XtyleEnvironment:
             apps=apps_dict,
         )
 
+    @metrics.timed("environment.collect_applications")
     def collect_applications(self):
         unique_id = generate_unique_id()
         root_path = pathlib.Path("xtyle") / pathlib.Path(unique_id)
@@ -842,6 +1121,7 @@ class XtyleEnvironment:
             files=final_build,
         )
 
+    @metrics.timed("environment.create_static")
     def create_static(self):
         project = self.collect_applications()
         root_path = pathlib.Path(self.static_dir) / project.meta.path
@@ -863,6 +1143,24 @@ class XtyleEnvironment:
         # Return Info
         return project.meta.__dict__
 
+    def compile_components(self, components: list, theme: str = None) -> list:
+        concurrent = self.xtyle_concurrency > 1 and len(components) > 1
+        if concurrent and httpx_available and isinstance(self.xtyle_client, Client):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self._compile_components(components, theme))
+        return self.xtyle_client.components(components, theme=theme)
+
+    async def _compile_components(self, components: list, theme: str = None):
+        async with AsyncClient(
+            self.xtyle_client.host,
+            pool_size=self.xtyle_concurrency,
+            timeout=self.xtyle_client.timeout,
+            concurrency=self.xtyle_concurrency,
+        ) as client:
+            return await client.component_many(components, theme=theme)
+
     @staticmethod
     def clean_final_value(value):
         if isinstance(value, str):
@@ -872,6 +1170,7 @@ class XtyleEnvironment:
             return ""
         return value
 
+    @metrics.timed("environment.export_module_zip")
     def export_module_zip(self, module_name: str):
         theme_dict = self.environment.module.get_by(name=module_name)
         compo_list = self.all("component", module_name)
@@ -881,17 +1180,19 @@ class XtyleEnvironment:
             "components": {},
             "styles": {item.get("name"): item.get("code") for item in style_list},
         }
+        builds = []
         for row in compo_list:
             build = self._build_component(row, module_name)
             if build:
-                data = self.xtyle_client.component(**build.__dict__, theme=module_name)
-                if data:
-                    name = data.get("name")
-                    export_dict["components"][name] = dict(
-                        index=data.get("index"),
-                        style=data.get("style"),
-                        docs=data.get("docs"),
-                        props=data.get("props"),
-                    )
+                builds.append(build.__dict__)
+        for data in self.compile_components(builds, module_name):
+            if data:
+                name = data.get("name")
+                export_dict["components"][name] = dict(
+                    index=data.get("index"),
+                    style=data.get("style"),
+                    docs=data.get("docs"),
+                    props=data.get("props"),
+                )
         return self.esmodule.create_zip(export_dict)
         # return export_dict.get("components")
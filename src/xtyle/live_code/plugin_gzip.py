@@ -1,10 +1,53 @@
 import json
 import gzip
+import zlib
 from io import BytesIO
 from types import SimpleNamespace
 
 
 class PluginGzip:
+    encodings = ("gzip", "deflate")
+
+    @staticmethod
+    def compress(data: bytes, encoding: str = "gzip", level: int = 6) -> bytes:
+        """
+        Compresses bytes (HTTP `Content-Encoding`).
+
+        Args:
+            data (bytes): Raw data.
+            encoding (str): `gzip` or `deflate` (zlib).
+            level (int): Compression level (1 = fastest, 9 = smallest).
+
+        Returns:
+            bytes: Compressed data.
+        """
+        if encoding == "gzip":
+            return gzip.compress(data, compresslevel=level, mtime=0)
+        if encoding == "deflate":
+            return zlib.compress(data, level)
+        raise ValueError(f"Unknown encoding: {encoding}")
+
+    @staticmethod
+    def decompress(data: bytes, encoding: str = "gzip") -> bytes:
+        """
+        Decompresses bytes (HTTP `Content-Encoding`).
+
+        Args:
+            data (bytes): Compressed data.
+            encoding (str): `gzip` or `deflate` (zlib or raw).
+
+        Returns:
+            bytes: Raw data.
+        """
+        if encoding == "gzip":
+            return gzip.decompress(data)
+        if encoding == "deflate":
+            try:
+                return zlib.decompress(data)
+            except zlib.error:
+                return zlib.decompress(data, -zlib.MAX_WBITS)
+        raise ValueError(f"Unknown encoding: {encoding}")
+
     @staticmethod
     def load_json(json_data: dict, namespacing: bool = True) -> SimpleNamespace:
         if namespacing:
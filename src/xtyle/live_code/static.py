@@ -6,6 +6,8 @@ import functools
 from jinja2 import Environment, FileSystemLoader
 from markupsafe import Markup
 
+from .. import metrics
+
 try:
     from django.templatetags.static import static
     from django.urls import reverse
@@ -94,6 +96,7 @@ class XtyleApp:
     def load_config(self):
         self.config = load_config(self.base_dir)
 
+    @metrics.timed("static.render")
     def render(self, __url_path__, **kwargs):
         input_name = self.get_app_from_url(__url_path__)
         app_name = self._rename.get(input_name)
@@ -0,0 +1,491 @@
+"""
+SQLite tables of the live-code environment.
+
+`sqlow` tables keep their open connection on the table object, so one table
+can not be used by two threads at once. `Table` keeps it per thread instead,
+which lets the environment create its tables once and share them.
+
+Lookups go by `name` (`get_by(name=...)`), every table gets a unique index
+on it (`id` is the rowid, already indexed), and `get_many` fetches the rows
+of many names in one query.
+
+Connections use WAL journaling (readers do not wait for a writer), wait up
+to `busy_timeout` seconds for a lock instead of failing with "database is
+locked", and sync less often (`synchronous=NORMAL`). See `Pragmas`.
+
+Every call opens, commits and closes its own connection. Inside
+`with transaction():` the calls of the thread share one connection per
+database file instead, and commit once at the end (or roll back).
+
+`ScopedTable` is the table of one module in the single-file storage mode:
+the rows of every module share one table, keyed by `module_id`, with a
+`UNIQUE(module_id, name)` index (instead of `UNIQUE(name)`).
+
+Usage (from one file per module to the single file):
+    python -m xtyle.live_code.storage migrate ./project [--remove-files]
+"""
+
+# Python
+import argparse
+import contextlib
+import dataclasses
+import os
+import pathlib
+import sqlite3
+import threading
+
+# Extras
+from ..external_plugins import (
+    SQLowDatabase,
+    PreDefinedClass,
+    Value,
+    decorator_config,
+    slugify,
+)
+
+# SQLite: at most 999 variables per query (older builds)
+MAX_VARIABLES = 500
+
+# SQLite Settings
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SYNCHRONOUS = ("off", "normal", "full", "extra")
+
+
+@dataclasses.dataclass(frozen=True)
+class Pragmas:
+    """
+    SQLite settings of the environment databases.
+
+    Args:
+        journal_mode (str): `wal` (readers run during a write) or a rollback
+            journal (`delete`, the SQLite default, ...).
+        busy_timeout (float): Seconds to wait for a lock held by another
+            connection or process.
+        synchronous (str): `normal` (safe with WAL, syncs at checkpoints) or
+            `full` (syncs every commit), ...
+    """
+
+    journal_mode: str = "wal"
+    busy_timeout: float = 5.0
+    synchronous: str = "normal"
+
+    def __post_init__(self):
+        if self.journal_mode.lower() not in JOURNAL_MODES:
+            raise ValueError(f"Unknown journal mode: {self.journal_mode}")
+        if self.synchronous.lower() not in SYNCHRONOUS:
+            raise ValueError(f"Unknown synchronous level: {self.synchronous}")
+
+
+# Journal mode already set (per process): {database: mode}
+_journal_modes = {}
+_journal_lock = threading.Lock()
+
+
+def set_journal_mode(database: str, pragmas: Pragmas) -> None:
+    """
+    Set the journal mode of a database file (once per process).
+
+    Runs on its own autocommit connection: the mode can not change inside a
+    transaction, and it is stored in the file.
+    """
+    database = os.path.abspath(database)
+    mode = pragmas.journal_mode.lower()
+    with _journal_lock:
+        if _journal_modes.get(database) == mode:
+            return
+        connection = sqlite3.connect(
+            database, timeout=pragmas.busy_timeout, isolation_level=None
+        )
+        try:
+            connection.execute(f"PRAGMA journal_mode = {mode}")
+            _journal_modes[database] = mode
+        except sqlite3.OperationalError:
+            # Locked: try again next time a table opens it
+            pass
+        finally:
+            connection.close()
+
+
+def _forget_journal_mode(database: str) -> None:
+    with _journal_lock:
+        _journal_modes.pop(os.path.abspath(database), None)
+
+
+def copy_database(src: str, dst: str) -> None:
+    """Copy a database (its WAL included, unlike copying the file)."""
+    # Read-only: a missing source raises (instead of creating an empty one)
+    try:
+        uri = pathlib.Path(src).resolve().as_uri()
+        source = sqlite3.connect(f"{uri}?mode=ro", uri=True)
+    except sqlite3.OperationalError as e:
+        raise FileNotFoundError(f"No database: {src}") from e
+    target = sqlite3.connect(dst)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    _forget_journal_mode(dst)
+
+
+def remove_database(path: str) -> None:
+    """Remove a database and its `-wal` / `-shm` files."""
+    os.remove(path)
+    _forget_journal_mode(path)
+    for suffix in ("-wal", "-shm"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(f"{path}{suffix}")
+
+
+# Transaction of each thread: {database: connection}
+_transaction = threading.local()
+
+
+@contextlib.contextmanager
+def transaction():
+    """
+    Group the writes of the current thread (all-or-nothing per database).
+
+    Nested blocks join the outermost one. An exception rolls every database
+    back, otherwise each one commits once when the block ends.
+    """
+    if getattr(_transaction, "connections", None) is not None:
+        yield
+        return
+    _transaction.connections = connections = {}
+    try:
+        yield
+    except BaseException:
+        for connection in connections.values():
+            connection.rollback()
+        raise
+    else:
+        for connection in connections.values():
+            connection.commit()
+    finally:
+        _transaction.connections = None
+        for connection in connections.values():
+            connection.close()
+
+
+def in_transaction() -> bool:
+    return getattr(_transaction, "connections", None) is not None
+
+
+class Table(SQLowDatabase):
+    """sqlow table, safe to share between threads."""
+
+    def __init__(self, table_class, db_name: str, pragmas: Pragmas = None):
+        self._local = threading.local()
+        self.pragmas = pragmas or Pragmas()
+        super().__init__(table_class=table_class, db_name=str(db_name))
+
+    @property
+    def connection(self):
+        return getattr(self._local, "connection", None)
+
+    @connection.setter
+    def connection(self, value):
+        self._local.connection = value
+
+    @property
+    def cursor(self):
+        return getattr(self._local, "cursor", None)
+
+    @cursor.setter
+    def cursor(self, value):
+        self._local.cursor = value
+
+    # Connections
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_name, timeout=self.pragmas.busy_timeout)
+        connection.row_factory = sqlite3.Row
+        connection.execute(f"PRAGMA synchronous = {self.pragmas.synchronous}")
+        return connection
+
+    def _connect(self):
+        connections = getattr(_transaction, "connections", None)
+        if connections is None:
+            self.connection = self._open()
+        else:
+            if self.db_name not in connections:
+                connections[self.db_name] = self._open()
+            self.connection = connections[self.db_name]
+        self.cursor = self.connection.cursor()
+
+    def execute(self, query, params=None):
+        if not in_transaction():
+            # sqlow: a failed write returns `False`
+            return super().execute(query, params)
+        # Inside a transaction: a failed write rolls the block back
+        self._connect()
+        return self.cursor.execute(query, params or ())
+
+    def _close(self):
+        # Inside a transaction: commit (or roll back) when it ends
+        if not in_transaction():
+            super()._close()
+
+    # Indexes
+    index_columns = ("name",)
+
+    def _initialize_table(self):
+        set_journal_mode(self.db_name, self.pragmas)
+        self._connect()
+        self.cursor.execute(self._create_table_query)
+        self._close()
+        self.ensure_index()
+
+    def _indexed(self, columns: tuple) -> bool:
+        for index in self.fetch_all(f"PRAGMA index_list({self.table_name})"):
+            if not index["unique"]:
+                continue
+            info = self.fetch_all(f"PRAGMA index_info({index['name']})")
+            if tuple(row["name"] for row in info) == columns:
+                return True
+        return False
+
+    def ensure_index(self) -> None:
+        """Create the unique index of the lookups (unless the table has it)."""
+        columns = self.index_columns
+        if self._indexed(columns):
+            return
+        name = f"{self.table_name}_{'_'.join(columns)}"
+        self._connect()
+        try:
+            self.cursor.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_unique "
+                f"ON {self.table_name} ({', '.join(columns)})"
+            )
+        except sqlite3.IntegrityError:
+            # Duplicated rows (older tables): still faster lookups
+            self.cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} "
+                f"ON {self.table_name} ({', '.join(columns)})"
+            )
+        self._close()
+
+    # Bulk
+    def _select_many(self, names: list, where: str = "", params: tuple = ()):
+        rows = []
+        for start in range(0, len(names), MAX_VARIABLES):
+            chunk = names[start : start + MAX_VARIABLES]
+            marks = ", ".join("?" for _ in chunk)
+            query = f"SELECT * FROM {self.table_name} WHERE {where}name IN ({marks})"
+            rows.extend(self.fetch_all(query, params + tuple(chunk)))
+        return rows
+
+    # Listings
+    def _scope(self) -> tuple:
+        """SQL condition (and params) of the rows the table sees."""
+        return "", ()
+
+    def columns(self) -> list:
+        return [field.name for field in dataclasses.fields(self.__daclass__)]
+
+    def select(
+        self, fields: list = None, offset: int = 0, limit: int = None, after: int = None
+    ) -> list:
+        """
+        List only some columns (the others are not read), ordered by `id`.
+
+        Args:
+            fields (list): The columns (default: all of them).
+            offset (int): Rows to skip.
+            limit (int): At most this many rows.
+            after (int): Only the rows with a greater `id` (cursor).
+
+        Returns:
+            list: The rows (`dict`).
+        """
+        return self.page(fields, offset, limit, after)[0]
+
+    def page(
+        self, fields: list = None, offset: int = 0, limit: int = None, after: int = None
+    ) -> tuple:
+        """Same as `select`, with the `id` of the last row (`None`: no rows)."""
+        columns = [name for name in self.columns() if fields is None or name in fields]
+        columns = [name for name in columns if name != "module_id"]
+        # `id` is always read (the cursor of the next page)
+        selected = columns if "id" in columns else ["id", *columns]
+        conditions, params = self._scope()
+        conditions = [conditions] if conditions else []
+        if after is not None:
+            conditions.append("id > ?")
+            params += (after,)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = (
+            f"SELECT {', '.join(selected)} FROM {self.table_name}{where} "
+            "ORDER BY id LIMIT ? OFFSET ?"
+        )
+        limit = -1 if limit is None else limit
+        rows = self.fetch_all(query, params + (limit, offset or 0))
+        last_id = rows[-1]["id"] if rows else None
+        output = []
+        for row in rows:
+            # Same values as `get_by` (JSON, bool, ...)
+            row = Value.load(self, row)
+            output.append({name: row[name] for name in columns})
+        return output, last_id
+
+    def count(self) -> int:
+        conditions, params = self._scope()
+        where = f" WHERE {conditions}" if conditions else ""
+        query = f"SELECT COUNT(*) FROM {self.table_name}{where}"
+        return self.fetch_one(query, params)[0]
+
+    def get_many(self, names: list) -> dict:
+        """
+        The rows of many names, in one query (per 500 names).
+
+        Args:
+            names (list): The names (as given to `get_by(name=...)`).
+
+        Returns:
+            dict: `{name: row}`, only the names that were found.
+        """
+        slugs = {slugify(str(name)): name for name in names}
+        rows = self._select_many(list(slugs))
+        output = {}
+        for row in rows:
+            row = Value.load(self, row)
+            output[slugs[row["name"]]] = row
+        return output
+
+
+class ScopedTable(Table):
+    """The rows of one module, in a table shared by every module."""
+
+    def __init__(
+        self, table_class, db_name: str, module_id: int, pragmas: Pragmas = None
+    ):
+        self.module_id = module_id
+        super().__init__(table_class, db_name, pragmas)
+
+    index_columns = ("module_id", "name")
+
+    @property
+    def _create_table_query(self):
+        # Names are unique per module (`unique_together`)
+        return super()._create_table_query.replace("name TEXT UNIQUE", "name TEXT")
+
+    @staticmethod
+    def _unscoped(row: dict | None) -> dict | None:
+        if row:
+            row.pop("module_id", None)
+        return row
+
+    def insert(self, **kwargs):
+        kwargs["module_id"] = self.module_id
+        return super().insert(**kwargs)
+
+    def update(self, item_id, **kwargs):
+        kwargs.pop("module_id", None)
+        return super().update(item_id, **kwargs)
+
+    def get_by(self, **kwargs):
+        return self._unscoped(super().get_by(module_id=self.module_id, **kwargs))
+
+    def _scope(self) -> tuple:
+        return "module_id = ?", (self.module_id,)
+
+    def get_many(self, names: list) -> dict:
+        rows = super().get_many(names)
+        return {name: self._unscoped(row) for name, row in rows.items()}
+
+    def _select_many(self, names: list, where: str = "", params: tuple = ()):
+        return super()._select_many(names, "module_id = ? AND ", (self.module_id,))
+
+    def all(self):
+        query = f"SELECT * FROM {self.table_name} WHERE module_id = ? ORDER BY id"
+        rows = self.fetch_all(query, (self.module_id,))
+        return [self._unscoped(Value.load(self, row)) for row in rows]
+
+    def delete(self, **kwargs):
+        return super().delete(module_id=self.module_id, **kwargs)
+
+    def delete_all(self):
+        query = f"DELETE FROM {self.table_name} WHERE module_id = ?"
+        return self.execute(query, (self.module_id,))
+
+    def drop(self):
+        # The table is shared: only the rows of the module
+        return self.delete_all()
+
+
+def model_class(model, scoped: bool = False):
+    """
+    The same dataclass `sqlow` builds for a model (`id`, `name` + its fields).
+
+    Args:
+        model: The model class.
+        scoped (bool): Add `module_id`, unique together with `name`.
+    """
+    class_list = [PreDefinedClass, dataclasses.dataclass(model)]
+    annotations = {}
+    for cls in class_list:
+        annotations.update(getattr(cls, "__annotations__", {}))
+    attrs = {"__annotations__": annotations}
+    config = {}
+    if scoped:
+        annotations["module_id"] = int
+        attrs["module_id"] = None
+        config["unique_together"] = [("module_id", "name")]
+    merged = type(model.__name__, tuple(class_list[::-1]), attrs)
+    decorator_config(merged, config)
+    return merged
+
+
+def table(database: str, model, pragmas: Pragmas = None) -> Table:
+    """
+    Open (and create if needed) the table of a model.
+
+    Args:
+        database (str): Path of the SQLite file.
+        model: The model class (e.g. `types.Component`).
+        pragmas (Pragmas): SQLite settings (default: WAL).
+
+    Returns:
+        Table: The table.
+    """
+    return Table(model_class(model), database, pragmas)
+
+
+def scoped_table(
+    database: str, model, module_id: int, pragmas: Pragmas = None
+) -> ScopedTable:
+    """
+    Open (and create if needed) the shared table of a model, for one module.
+
+    Args:
+        database (str): Path of the SQLite file (shared by every module).
+        model: The model class (e.g. `types.Component`).
+        module_id (int): The module.
+        pragmas (Pragmas): SQLite settings (default: WAL).
+
+    Returns:
+        ScopedTable: The table (only the rows of the module).
+    """
+    return ScopedTable(model_class(model, scoped=True), database, module_id, pragmas)
+
+
+def main():
+    from .environment import XtyleEnvironment
+
+    parser = argparse.ArgumentParser(description="Xtyle environment storage")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser(
+        "migrate", help="Copy the per-module files into the single-file storage"
+    )
+    migrate.add_argument("base_dir", type=pathlib.Path)
+    migrate.add_argument("--remove-files", action="store_true")
+    args = parser.parse_args()
+
+    env = XtyleEnvironment(base_dir=args.base_dir, storage_mode="single")
+    copied = env.migrate_storage(remove_files=args.remove_files)
+    for name, count in copied.items():
+        print(f"{name}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Synthetic environments (for benchmarks and profiling at scale).
+
+Fills an `XtyleEnvironment` (the `.xtyle_db/xtyle.sqlite3` core database and
+the per-module `.xtyle/<id>.sqlite3` files) with deterministic content based
+on the `component-samples`. The same arguments and `seed` always produce the
+same rows.
+
+Usage:
+    python -m xtyle.live_code.synthetic ./project --modules 10 --components 100
+"""
+
+import argparse
+import pathlib
+import random
+from types import SimpleNamespace
+
+from .sample import component as component_samples
+
+COLORS = ["red", "blue", "green", "orange", "purple", "teal", "gray", "black"]
+
+
+def module_name(index: int) -> str:
+    return f"module-{index}"
+
+
+def component_row(rng: random.Random, index: int) -> dict:
+    color = rng.choice(COLORS)
+    padding = rng.randint(0, 32)
+    return {
+        "name": f"component-{index}",
+        "code": component_samples.code_tsx.text,
+        "style": component_samples.style_scss.text
+        + f"\n.#{{$NAME}} {{ color: {color}; padding: {padding}px; }}\n",
+        "props": component_samples.props_tsx.text,
+        "docs": component_samples.docs_tsx.text,
+    }
+
+
+def view_row(rng: random.Random, index: int) -> dict:
+    return {
+        "name": f"view-{index}",
+        "path": "/" if index == 0 else f"/view-{index}",
+        "code": component_samples.code_tsx.text,
+        "style": f".view-{index} {{ margin: {rng.randint(0, 16)}px; }}",
+    }
+
+
+def style_row(rng: random.Random, index: int) -> dict:
+    color = rng.choice(COLORS)
+    return {
+        "name": f"style-{index}",
+        "code": f"$color-{index}: {color};\n.theme-{index} {{ color: $color-{index}; }}",
+    }
+
+
+def props_row(rng: random.Random, index: int) -> dict:
+    return {"name": f"props-{index}", "code": component_samples.props_tsx.text}
+
+
+def declaration_row(rng: random.Random, index: int) -> dict:
+    return {
+        "name": f"declaration-{index}",
+        "code": f"declare const global{index}: {{ value: {rng.randint(0, 999)} }};",
+    }
+
+
+def plugin_row(rng: random.Random, index: int) -> dict:
+    name = f"plugin{index}"
+    return {
+        "name": f"plugin-{index}",
+        "version": f"0.{index}.{rng.randint(0, 9)}",
+        "style": f".{name}{{color:{rng.choice(COLORS)}}}",
+        "javascript": f"var {name}={{install:function(){{return{{}}}}}};",
+        "declarations": f"declare const {name}: {{}};",
+    }
+
+
+def populate(
+    env,
+    modules: int = 1,
+    components: int = 10,
+    views: int = 1,
+    styles: int = 1,
+    props: int = 1,
+    declarations: int = 1,
+    plugins: int = 1,
+    seed: int = 0,
+) -> SimpleNamespace:
+    """
+    Fill an environment with synthetic rows.
+
+    Args:
+        env (XtyleEnvironment): The environment.
+        modules (int): Modules (each one gets its own database).
+        components (int): Components per module.
+        views (int): Views per module.
+        styles (int): Styles per module.
+        props (int): Global props.
+        declarations (int): Global declarations.
+        plugins (int): Global plugins.
+        seed (int): Seed of the generated content.
+
+    Returns:
+        SimpleNamespace: The names of the generated modules and the row counts.
+    """
+    rng = random.Random(seed)
+
+    # Core Database
+    for index in range(props):
+        env.set("props", props_row(rng, index))
+    for index in range(declarations):
+        env.set("declaration", declaration_row(rng, index))
+    for index in range(plugins):
+        env.set("plugin", plugin_row(rng, index))
+
+    # Modules
+    names = []
+    for module_index in range(modules):
+        name = module_name(module_index)
+        names.append(name)
+        env.set("module", {"name": name, **env.sample_module()})
+        rows = [component_row(rng, index) for index in range(components)]
+        env.bulk_set("component", rows, name)
+        env.bulk_set("view", [view_row(rng, index) for index in range(views)], name)
+        env.bulk_set("style", [style_row(rng, index) for index in range(styles)], name)
+
+    return SimpleNamespace(
+        modules=names,
+        components=modules * components,
+        views=modules * views,
+        styles=modules * styles,
+        props=props,
+        declarations=declarations,
+        plugins=plugins,
+    )
+
+
+def main():
+    from .environment import XtyleEnvironment
+
+    parser = argparse.ArgumentParser(description="Create a synthetic environment")
+    parser.add_argument("base_dir", type=pathlib.Path)
+    parser.add_argument("--modules", type=int, default=10)
+    parser.add_argument("--components", type=int, default=100)
+    parser.add_argument("--views", type=int, default=1)
+    parser.add_argument("--styles", type=int, default=1)
+    parser.add_argument("--props", type=int, default=1)
+    parser.add_argument("--declarations", type=int, default=1)
+    parser.add_argument("--plugins", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = vars(parser.parse_args())
+    env = XtyleEnvironment(base_dir=args.pop("base_dir"))
+    print(populate(env, **args))
+
+
+if __name__ == "__main__":
+    main()
@@ -48,6 +48,18 @@ def parse_type(type_string):
     return SimpleNamespace(**typescript_type)
 
 
+def pascal_case(name: str) -> str:
+    """Component name (`my-button` -> `MyButton`), as the xtyle server names it."""
+    return (name or "component").title().replace("-", "").replace("_", "")
+
+
+def declaration(name: str, docs: str = None, props: str = None) -> str:
+    """TypeScript declaration of a component (docs and props type)."""
+    props_type = parse_type(props or "").props or ""
+    props_type = "{\n  " + props_type + "\n}" if props_type else "{}"
+    return f"{(docs or '').strip()}\n{name}: (props: {props_type}) => object;".strip()
+
+
 def jinja_render(text, **kwargs):
     template = Template(
         text,
@@ -0,0 +1,117 @@
+"""
+In-process `xtyle.Client` (no NodeJS server required).
+
+Same methods and output shapes as `xtyle.Client`, computed with the embedded
+engines: Babel (`typescript` + `react` presets) for `tsx`, `component` and
+`plugin`, Babel's compact output for `minify` and libsass for `css`.
+
+Usage:
+    engine = xtyle.LocalClient()
+
+    xtyle.Environment(base_dir=..., xtyle_client=engine)
+"""
+
+# Python
+import re
+from types import SimpleNamespace
+
+# Locals
+from . import core, metrics
+from .client import component_payload
+from .live_code.typescript_tools import declaration, pascal_case
+
+
+def identifier(name: str) -> str:
+    """Javascript name of a plugin (`my-plugin` -> `myPlugin`)."""
+    return re.sub(r"[^\w$]+(\w?)", lambda m: m.group(1).upper(), name) or "plugin"
+
+
+class LocalClient:
+    """Xtyle Client (in-process)"""
+
+    host = "local"
+    timeout = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    @property
+    def server_version(self) -> str:
+        return f"local-{core.tool_version('jsx')[:12]}"
+
+    def _call(self, function: str, *args):
+        with metrics.span(f"local.{function}"):
+            try:
+                return core.get_pool("jsx").call(function, *args)
+            except Exception as e:
+                print(f"LocalClient error: {str(e).splitlines()[0]}")
+                metrics.count(f"local.{function}.errors")
+                return None
+
+    def ping(self, **kwargs) -> SimpleNamespace:
+        data = {"status": "ok", "version": self.server_version, **kwargs}
+        return SimpleNamespace(data=data, error=None)
+
+    def tsx(self, code_string: str) -> str:
+        return self._call("TSX", code_string or "") or ""
+
+    def css(self, code_string: str) -> str:
+        try:
+            return core.scss(code_string or "").strip()
+        except Exception as e:
+            print(f"LocalClient error: {e}")
+            return ""
+
+    def minify(self, code_string: str) -> str:
+        return self._call("minifyCode", code_string or "") or ""
+
+    def component(self, **kwargs) -> dict:
+        data = component_payload(**kwargs)
+        name = pascal_case(data["name"])
+        code = data["code"] or ""
+        style = f'$NAME: "{name}";\n\n{data["style"] or ""}'
+        return {
+            "name": name,
+            "index": f'const $NAME = "{name}";\n{code}',
+            "style": style,
+            "props": data["props"],
+            "docs": data["docs"],
+            "buildIndex": self._call("buildComponent", name, code) or "",
+            "buildStyle": self.css(style),
+            "declaration": declaration(name, data["docs"], data["props"]),
+        }
+
+    def components(self, components: list, theme: str = None) -> list:
+        return [self.component(**{**item, "theme": theme}) for item in components]
+
+    def plugin(
+        self,
+        name: str = None,
+        components: list = None,
+        install: dict = None,
+        **ignored,
+    ) -> dict:
+        name = identifier(name or "plugin")
+        items = [
+            {"name": pascal_case(item.get("name")), "code": item.get("code") or ""}
+            for item in components or []
+        ]
+        styles = [
+            f'$NAME: "{item["name"]}";\n\n{raw.get("style") or ""}\n'
+            for item, raw in zip(items, components or [])
+        ]
+        declarations = "\n\n".join(
+            declaration(item["name"], raw.get("docs"), raw.get("props"))
+            for item, raw in zip(items, components or [])
+        )
+        return {
+            "javascript": self._call("buildPlugin", name, items, install or {}) or "",
+            "style": self.css("".join(styles)),
+            "declarations": f"declare const {name}: {{\n{declarations}\n}}",
+        }
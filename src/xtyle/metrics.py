@@ -0,0 +1,248 @@
+"""
+Timing spans and counters for the hot paths (transforms, builds, renders).
+
+Nothing is measured until `enable()` is called, a disabled span costs one
+attribute check. Every measure is sent to the exporters, callables with the
+signature `exporter(kind, name, value)` where `kind` is `"span"` (value in
+seconds) or `"counter"`. Use them to feed Prometheus, StatsD, logs, ...
+
+Usage:
+    from xtyle import metrics
+
+    metrics.enable()  # Also registers `metrics.aggregator`
+    ...
+    print(metrics.report())
+    # {"spans": {"core.jsx": {"count": 10, "p50": ..., ...}}, "counters": {...}}
+"""
+
+# Python
+import bisect
+import functools
+import threading
+import time
+from collections import deque
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Measure the duration of a `with` block."""
+
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name: str):
+        self.registry = registry
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.registry.emit("span", self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Registry:
+    """Exporters of the spans and counters."""
+
+    def __init__(self):
+        self.enabled = False
+        self.exporters = []
+        self._lock = threading.Lock()
+
+    def add_exporter(self, exporter) -> None:
+        with self._lock:
+            if exporter not in self.exporters:
+                self.exporters = [*self.exporters, exporter]
+
+    def remove_exporter(self, exporter) -> None:
+        with self._lock:
+            self.exporters = [item for item in self.exporters if item != exporter]
+
+    def emit(self, kind: str, name: str, value: float) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter(kind, name, value)
+            except Exception as e:
+                print(f"Metrics exporter error: {e}")
+
+    def span(self, name: str):
+        """Context manager that measures a block (no-op when disabled)."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Increase a counter (no-op when disabled)."""
+        if self.enabled:
+            self.emit("counter", name, value)
+
+    def timed(self, name: str):
+        """Decorator that measures every call of a function."""
+
+        def decorator(method):
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return method(*args, **kwargs)
+                with Span(self, name):
+                    return method(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+def percentile(values: list, percent: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+# Seconds (upper bounds of the buckets)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
+
+class Histogram:
+    """Bucket counts, total and the latest samples (not locked, callers lock)."""
+
+    __slots__ = ("bounds", "buckets", "count", "total", "max", "samples")
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS, max_samples: int = 1000):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        self.samples.append(value)
+
+    def snapshot(self) -> dict:
+        """
+        Summary of the values.
+
+        Returns:
+            dict: `count, total, mean, max`, `p50/p95/p99` (latest samples) and
+                `buckets` (`{upper bound: count}`, the last one is `inf`).
+        """
+        samples = sorted(self.samples)
+        bounds = [*self.bounds, float("inf")]
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "buckets": dict(zip(bounds, self.buckets)),
+        }
+
+
+class Aggregator:
+    """Exporter that keeps the latest durations and the counter totals."""
+
+    def __init__(self, max_samples: int = 10_000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans = {}
+            self.span_totals = {}
+            self.counters = {}
+
+    def __call__(self, kind: str, name: str, value: float) -> None:
+        with self._lock:
+            if kind == "span":
+                samples = self.spans.get(name)
+                if samples is None:
+                    samples = self.spans[name] = deque(maxlen=self.max_samples)
+                    self.span_totals[name] = [0, 0.0]
+                samples.append(value)
+                totals = self.span_totals[name]
+                totals[0] += 1
+                totals[1] += value
+            else:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> dict:
+        """
+        Summary per span name (seconds) and counter totals.
+
+        Returns:
+            dict: `{"spans": {name: {count, total, mean, p50, p95, p99, max}},
+                "counters": {name: total}}`.
+        """
+        with self._lock:
+            spans = {name: sorted(samples) for name, samples in self.spans.items()}
+            totals = {name: list(total) for name, total in self.span_totals.items()}
+            counters = dict(self.counters)
+        output = {}
+        for name, samples in spans.items():
+            count, total = totals[name]
+            output[name] = {
+                "count": count,
+                "total": total,
+                "mean": total / count if count else 0.0,
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "max": samples[-1] if samples else 0.0,
+            }
+        return {"spans": output, "counters": counters}
+
+
+registry = Registry()
+aggregator = Aggregator()
+
+span = registry.span
+count = registry.count
+timed = registry.timed
+add_exporter = registry.add_exporter
+remove_exporter = registry.remove_exporter
+
+
+def enable(aggregate: bool = True) -> None:
+    """Start measuring (and aggregating, unless `aggregate=False`)."""
+    if aggregate:
+        registry.add_exporter(aggregator)
+    registry.enabled = True
+
+
+def disable() -> None:
+    """Stop measuring."""
+    registry.enabled = False
+
+
+def report() -> dict:
+    """p50/p95/p99 per span name of the built-in aggregator."""
+    return aggregator.report()
+
+
+def reset() -> None:
+    """Clear the built-in aggregator."""
+    aggregator.reset()
@@ -0,0 +1,150 @@
+"""
+Bounded pool of JavaScript (MiniRacer) contexts.
+
+A single MiniRacer context runs one call at a time, so every thread that
+calls `xtyle.jsx` or `xtyle.prettier` checks out its own context and gives it
+back when done. When every context is busy, callers wait in line.
+"""
+
+# Python
+import contextlib
+import threading
+import time
+from types import SimpleNamespace
+
+
+class ContextPool:
+    """Thread-safe pool of contexts built by `factory` (up to `size`)."""
+
+    def __init__(self, factory, size: int = 1):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self._idle = []
+        self._created = 0
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self._waiters = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the usage counters."""
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+
+    def acquire(self):
+        """Check out a context (blocks while all of them are busy)."""
+        start = None
+        ctx = None
+        with self._condition:
+            while not self._idle and self._created >= self.size:
+                if start is None:
+                    start = time.perf_counter()
+                self._waiters += 1
+                try:
+                    self._condition.wait()
+                finally:
+                    self._waiters -= 1
+            if self._idle:
+                ctx = self._idle.pop()
+            else:
+                self._created += 1
+            self._in_use += 1
+            self._checkouts += 1
+            if start is not None:
+                waited = time.perf_counter() - start
+                self._waits += 1
+                self._wait_time += waited
+                self._max_wait = max(self._max_wait, waited)
+        if ctx is None:
+            try:
+                ctx = self.factory()
+            except BaseException:
+                with self._condition:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._condition.notify()
+                raise
+        return ctx
+
+    def release(self, ctx):
+        """Give a context back to the pool."""
+        with self._condition:
+            self._in_use -= 1
+            if self._created > self.size:
+                # The pool was resized down
+                self._created -= 1
+            else:
+                self._idle.append(ctx)
+            self._condition.notify()
+
+    @contextlib.contextmanager
+    def context(self):
+        """Check out a context for the duration of a `with` block."""
+        ctx = self.acquire()
+        try:
+            yield ctx
+        finally:
+            self.release(ctx)
+
+    def call(self, function: str, *args):
+        """Call a Javascript function on any free context."""
+        with self.context() as ctx:
+            return ctx.call(function, *args)
+
+    def fill(self):
+        """Create every context of the pool ahead of time (in parallel)."""
+        with self._condition:
+            # Negative after shrinking a pool whose contexts are in use
+            missing = self.size - self._created
+            if missing <= 0:
+                return
+            self._created += missing
+        errors = []
+
+        def create():
+            try:
+                ctx = self.factory()
+            except BaseException as e:
+                with self._condition:
+                    self._created -= 1
+                    self._condition.notify_all()
+                errors.append(e)
+                return
+            with self._condition:
+                self._idle.append(ctx)
+                self._condition.notify()
+
+        threads = [threading.Thread(target=create) for _ in range(missing - 1)]
+        for thread in threads:
+            thread.start()
+        create()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def resize(self, size: int):
+        """Change the maximum number of contexts."""
+        with self._condition:
+            self.size = max(1, int(size))
+            while self._idle and self._created > self.size:
+                self._idle.pop()
+                self._created -= 1
+            self._condition.notify_all()
+
+    def stats(self) -> SimpleNamespace:
+        """Snapshot of the pool usage."""
+        with self._condition:
+            return SimpleNamespace(
+                size=self.size,
+                created=self._created,
+                idle=len(self._idle),
+                in_use=self._in_use,
+                waiters=self._waiters,
+                checkouts=self._checkouts,
+                waits=self._waits,
+                wait_time=self._wait_time,
+                max_wait=self._max_wait,
+            )
@@ -0,0 +1,115 @@
+"""
+Tail-latency controls of `xtyle.Client`.
+
+- `Deadline`: time budget of one call (every attempt and wait fits in it).
+- `backoff`: exponential delay with full jitter between retries.
+- `CircuitBreaker`: fails fast once the server keeps failing, then lets a
+  single probe through after `reset_timeout` seconds.
+"""
+
+# Python
+import random
+import threading
+import time
+
+# Extras
+from .external_plugins import requests, requests_available
+
+_ConnectionError = requests.ConnectionError if requests_available else ConnectionError
+_Timeout = requests.Timeout if requests_available else TimeoutError
+
+
+class CircuitOpenError(_ConnectionError):
+    """The circuit is open (the server is failing), the call was not sent."""
+
+
+class DeadlineExceeded(_Timeout):
+    """The call did not finish within its deadline."""
+
+
+class Deadline:
+    """Time budget of a call (`None` seconds: no deadline)."""
+
+    __slots__ = ("expires",)
+
+    def __init__(self, seconds: float = None):
+        self.expires = time.monotonic() + seconds if seconds else None
+
+    def remaining(self) -> float | None:
+        """Seconds left (raises `DeadlineExceeded` once there are none)."""
+        if self.expires is None:
+            return None
+        remaining = self.expires - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("xtyle: deadline exceeded")
+        return remaining
+
+    def timeout(self, timeout: float | tuple) -> float | tuple:
+        """The `requests` timeout, capped by the seconds left."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if isinstance(timeout, tuple):
+            return tuple(min(value, remaining) for value in timeout)
+        return min(timeout, remaining) if timeout else remaining
+
+    def allows(self, delay: float) -> bool:
+        """Whether `delay` seconds still fit in the budget."""
+        return self.expires is None or time.monotonic() + delay < self.expires
+
+
+def backoff(attempt: int, base: float, cap: float = 5.0) -> float:
+    """Full jitter: uniform between 0 and `base * 2 ** attempt` (at most `cap`)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class CircuitBreaker:
+    """Closed -> (failures) -> Open -> (reset_timeout) -> Half-Open -> Closed."""
+
+    def __init__(self, failures: int = 5, reset_timeout: float = 30.0):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.trips = 0
+        self.rejected = 0
+        self._count = 0
+        self._opened = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        """Raise `CircuitOpenError` unless a call may be sent."""
+        if not self.failures:
+            return
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened >= self.reset_timeout:
+                    self.state = "half-open"
+                    self._probing = False
+            if self.state == "half-open" and not self._probing:
+                self._probing = True
+                return
+            if self.state != "closed":
+                self.rejected += 1
+                raise CircuitOpenError("xtyle: circuit open, server unavailable")
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._count = 0
+            self._probing = False
+
+    def failure(self) -> None:
+        if not self.failures:
+            return
+        with self._lock:
+            self._count += 1
+            if self.state == "half-open" or self._count >= self.failures:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self._opened = time.monotonic()
+                self._probing = False
+
+    def reset(self) -> None:
+        self.success()
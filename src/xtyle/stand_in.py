@@ -0,0 +1,251 @@
+"""
+Local stand-in for the xtyle (NodeJS) server.
+
+Implements `/ping`, `/tsx`, `/scss`, `/minify`, `/component`, `/components`
+(batch) and `/plugin` with cheap, deterministic output (same input, same
+output), so tests and benchmarks can drive `xtyle.Client` without the real
+server. `latency` (and `jitter`) delay every response, to stand in for the
+compile time of the real server. Request and response bodies may be
+compressed (`gzip` / `deflate`, like the real server).
+
+Usage:
+    from xtyle.stand_in import StandInServer
+
+    with StandInServer() as server:
+        engine = xtyle.client(server.url)
+"""
+
+# Python
+import json
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+# Locals
+from .external_plugins import sass, sass_available
+from .live_code.plugin_gzip import PluginGzip
+from .live_code.typescript_tools import declaration, pascal_case
+
+VERSION = "stand-in"
+
+
+def minify(code: str) -> str:
+    lines = [line.strip() for line in (code or "").splitlines()]
+    return "".join(line for line in lines if line and not line.startswith("//"))
+
+
+def css(code: str) -> str:
+    if sass_available:
+        try:
+            return sass.compile(string=code or "", output_style="compressed").strip()
+        except sass.CompileError:
+            pass
+    return minify(code)
+
+
+def build_function(code: str) -> str:
+    return re.sub(r"export default function \w*", "function", minify(code))
+
+
+def component(data: dict) -> dict:
+    name = pascal_case(data.get("name"))
+    code = data.get("code") or ""
+    style = data.get("style") or ""
+    index = f'const $NAME = "{name}";\n{code}'
+    scss = f'$NAME: "{name}";\n\n{style}'
+    return {
+        "name": name,
+        "index": index,
+        "style": scss,
+        "props": data.get("props"),
+        "docs": data.get("docs"),
+        "buildIndex": f"const {name}={build_function(code)};",
+        "buildStyle": css(scss),
+        "declaration": declaration(name, data.get("docs"), data.get("props")),
+    }
+
+
+def plugin(data: dict) -> dict:
+    name = data.get("name") or "plugin"
+    items = data.get("components") or []
+    components = [component(item) for item in items]
+    members = [
+        f"{item['name']}:{build_function(raw.get('code'))}"
+        for item, raw in zip(components, items)
+    ]
+    install = json.dumps(data.get("install") or {}, sort_keys=True)
+    members.append(f"install:function(){{return {install}}}")
+    declarations = "\n\n".join(item["declaration"] for item in components)
+    return {
+        "javascript": f"var {name}={{{','.join(members)}}};",
+        "style": "".join(item["buildStyle"] for item in components),
+        "declarations": f"declare const {name}: {{\n{declarations}\n}}",
+    }
+
+
+ROUTES = {
+    "/ping": lambda data: {"status": "ok", "version": VERSION, **data},
+    "/tsx": lambda data: {"code": minify(data.get("code"))},
+    "/scss": lambda data: {"code": css(data.get("code"))},
+    "/minify": lambda data: {"code": minify(data.get("code"))},
+    "/component": lambda data: {"code": component(data.get("code") or {})},
+    "/components": lambda data: {"code": [component(x) for x in data.get("code") or []]},
+    "/plugin": lambda data: {"code": plugin(data.get("code") or {})},
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # No Nagle delay between the headers and the body
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        server = self.server.stand_in
+        with server.lock:
+            server.connections += 1
+
+    def _send(self, status: int, body: bytes = b""):
+        server = self.server.stand_in
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        encoding = self._accepted_encoding()
+        if encoding and len(body) >= server.compress_min_bytes:
+            body = PluginGzip.compress(body, encoding)
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.bytes_out += len(body)
+
+    def _accepted_encoding(self) -> str | None:
+        if not self.server.stand_in.compression:
+            return None
+        accepted = self.headers.get("Accept-Encoding") or ""
+        for encoding in PluginGzip.encodings:
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def do_POST(self):
+        server = self.server.stand_in
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        route = server.routes.get(self.path)
+        with server.lock:
+            server.requests[self.path] = server.requests.get(self.path, 0) + 1
+            server.bytes_in += len(raw)
+        if not route:
+            return self._send(404)
+        encoding = self.headers.get("Content-Encoding")
+        if encoding:
+            if not server.compression or encoding not in PluginGzip.encodings:
+                return self._send(415)
+            try:
+                raw = PluginGzip.decompress(raw, encoding)
+            except Exception:
+                return self._send(400)
+        try:
+            data = json.loads(raw or b"{}")
+        except ValueError:
+            return self._send(400)
+        delay = server.delay(self.path)
+        if delay > 0:
+            time.sleep(delay)
+        output = route(data)
+        if isinstance(output, int):
+            # Status only (e.g. `lambda data: 503`)
+            return self._send(output)
+        return self._send(200, json.dumps(output).encode("utf-8"))
+
+
+class StandInServer:
+    """The stand-in server, running on a background thread."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        routes: dict = None,
+        latency: float | dict = 0.0,
+        jitter: float = 0.0,
+        seed: int = None,
+        compression: bool = True,
+        compress_min_bytes: int = 1024,
+    ):
+        """
+        Args:
+            host (str): The interface to listen on.
+            port (int): The port (`0` picks a free one).
+            routes (dict): Extra or replaced routes (`None` answers 404, a route
+                returning an `int` answers that status).
+            latency (float | dict): Seconds added to every response (or per path).
+            jitter (float): Up to this many extra seconds (uniform).
+            seed (int): Seed of the jitter.
+            compression (bool): Accept and send compressed bodies.
+            compress_min_bytes (int): Smallest response body worth compressing.
+        """
+        self.routes = {**ROUTES, **(routes or {})}
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stand_in = self
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.connections = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def delay(self, path: str) -> float:
+        """Artificial latency of one request (seconds)."""
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(path, 0.0)
+        if self.jitter:
+            with self.lock:
+                latency += self._random.uniform(0, self.jitter)
+        return latency
+
+    def stats(self) -> SimpleNamespace:
+        with self.lock:
+            return SimpleNamespace(
+                requests=dict(self.requests),
+                connections=self.connections,
+                bytes_in=self.bytes_in,
+                bytes_out=self.bytes_out,
+            )
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+import xtyle
+
+
+def test_aio_transforms():
+    async def main():
+        return await asyncio.gather(
+            xtyle.aio.jsx("const App = () => <div>Hello World</div>"),
+            xtyle.aio.scss("$color: red; body { color: $color; }"),
+            xtyle.aio.scss_many(["a { color: red; }"]),
+        )
+
+    code_js, code_css, many = asyncio.run(main())
+    assert code_js.strip() == """const App = () => h("div", null, "Hello World");"""
+    assert code_css.strip() == "body{color:red}"
+    assert many[0].data.strip() == "a{color:red}"
+
+
+def test_aio_client():
+    class Recorder:
+        host = "http://stand-in"
+
+        def __init__(self):
+            self.threads = set()
+
+        def minify(self, code_string):
+            self.threads.add(threading.current_thread().name)
+            return code_string.strip()
+
+    recorder = Recorder()
+    engine = xtyle.aio.Client(client=recorder)
+
+    async def main():
+        return await asyncio.gather(*[engine.minify(f" {i} ") for i in range(5)])
+
+    assert asyncio.run(main()) == ["0", "1", "2", "3", "4"]
+    assert all(name.startswith("xtyle-aio") for name in recorder.threads)
+    assert engine.host == "http://stand-in"
@@ -0,0 +1,327 @@
+import pytest
+import requests
+
+import xtyle
+from xtyle.stand_in import StandInServer
+
+
+def create_component(name):
+    return {
+        "name": name,
+        "code": "\nexport default function Component(props: Props = {}) {\n  return <div>{props.children}</div>;\n}\n",
+        "style": "\n$color: red;\n.#{$NAME} { color: $color; }\n",
+        "props": "\ntype Props = {\n  children?: any;\n};\n\nexport default Props;\n",
+        "docs": "\n/**\n * Component - This is a my component.\n */\n",
+    }
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StandInServer() as stand_in:
+        yield stand_in
+
+
+def test_stand_in(server):
+    engine = xtyle.client(server.url)
+
+    assert engine.ping().data["version"] == "stand-in"
+    assert engine.minify("a\n  b\n") == "ab"
+    assert engine.css("$c: red; a { color: $c; }") == "a{color:red}"
+
+    component = engine.component(**create_component("custom-button"))
+    assert component["name"] == "CustomButton"
+    assert component["buildStyle"] == ".CustomButton{color:red}"
+
+    plugin = engine.plugin("myPlugin", [create_component("alert")], {"init": "x"})
+    assert plugin["javascript"].startswith("var myPlugin={Alert:function")
+    assert plugin["style"] == ".Alert{color:red}"
+
+
+def test_keep_alive():
+    with StandInServer() as server:
+        with xtyle.client(server.url, pool_size=2, timeout=(1, 5)) as engine:
+            for index in range(5):
+                assert engine.minify(f" {index} ") == str(index)
+        assert engine._session is None
+        assert server.stats().connections == 1
+
+
+def test_async_client(server):
+    import asyncio
+
+    async def main():
+        async with xtyle.AsyncClient(server.url, concurrency=4) as engine:
+            pong = await engine.ping()
+            minified = await asyncio.gather(*[engine.minify(f" {i} ") for i in range(8)])
+            components = await engine.component_many(
+                [create_component("alert"), create_component("custom-button")]
+            )
+            return pong, minified, components
+
+    pong, minified, components = asyncio.run(main())
+    assert pong.data["version"] == "stand-in"
+    assert minified == [str(i) for i in range(8)]
+    assert [item["name"] for item in components] == ["Alert", "CustomButton"]
+
+
+def test_components_batch():
+    items = [create_component(f"item-{index}") for index in range(10)]
+    with StandInServer() as server:
+        engine = xtyle.client(server.url, batch_size=4)
+        output = engine.components(items, theme="theme")
+        assert [item["name"] for item in output] == [f"Item{i}" for i in range(10)]
+        assert output[3] == engine.component(**items[3], theme="theme")
+        assert server.stats().requests == {"/components": 3, "/component": 1}
+
+        # Byte limit
+        engine = xtyle.client(server.url, batch_bytes=1)
+        assert len(engine.components(items[:2])) == 2
+        assert server.stats().requests["/components"] == 5
+
+
+def test_components_fallback():
+    with StandInServer(routes={"/components": None}) as server:
+        engine = xtyle.client(server.url)
+        output = engine.components([create_component("a"), create_component("b")])
+        assert [item["name"] for item in output] == ["A", "B"]
+        assert engine.batch_supported is False
+        assert server.stats().requests == {"/components": 1, "/component": 2}
+
+
+def test_components_failed_batch():
+    from xtyle import stand_in
+
+    items = [create_component("a"), create_component("b")]
+    # Error: per item, the endpoint is not marked as supported
+    with StandInServer(routes={"/components": lambda data: 500}) as server:
+        engine = xtyle.client(server.url, retries=0)
+        output = engine.components(items)
+        assert [item["name"] for item in output] == ["A", "B"]
+        assert engine.batch_supported is None
+        assert server.stats().requests == {"/components": 1, "/component": 2}
+
+    # Short answer: per item
+    short = lambda data: {"code": [stand_in.component(data["code"][0])]}
+    with StandInServer(routes={"/components": short}) as server:
+        engine = xtyle.client(server.url)
+        output = engine.components(items)
+        assert [item["name"] for item in output] == ["A", "B"]
+        assert server.stats().requests == {"/components": 1, "/component": 2}
+
+
+def test_response_cache(tmp_path):
+    with StandInServer() as server:
+        cache = xtyle.CompileCache(path=tmp_path / "client")
+        engine = xtyle.client(server.url, cache=cache)
+        items = [create_component("a"), create_component("b")]
+        first = [engine.minify(" x "), engine.components(items)]
+        assert [engine.minify(" x "), engine.components(items)] == first
+        assert engine.server_version == "stand-in"
+        assert server.stats().requests == {"/ping": 1, "/minify": 1, "/components": 1}
+
+        # Disk store (shared by a new client)
+        engine = xtyle.client(server.url, cache=xtyle.CompileCache(path=tmp_path / "client"))
+        assert engine.component(**items[1]) == first[1][1]
+        assert server.stats().requests.get("/component") is None
+
+        # New server version
+        server.routes["/ping"] = lambda data: {"status": "ok", "version": "2"}
+        assert engine.refresh_server_version() == "2"
+        assert engine.minify(" x ") == "x"
+        assert server.stats().requests["/minify"] == 2
+
+
+def test_response_cache_without_ping(tmp_path, monkeypatch):
+    import sys
+
+    client_module = sys.modules["xtyle.client"]
+
+    with StandInServer(routes={"/ping": None}) as server:
+        engine = xtyle.client(server.url, cache=xtyle.CompileCache())
+        assert [engine.minify(" x ") for _ in range(5)] == ["x"] * 5
+        assert engine.server_version == client_module.UNKNOWN_VERSION
+        assert server.stats().requests == {"/ping": 1, "/minify": 1}
+
+        # Asked again later, a known version replaces the unknown one
+        monkeypatch.setattr(client_module, "VERSION_RETRY", 0.0)
+        server.routes["/ping"] = lambda data: {"status": "ok", "version": "2"}
+        assert engine.server_version == "2"
+        assert engine.minify(" x ") == "x"
+        assert server.stats().requests["/minify"] == 2
+
+
+def test_local_client(server):
+    local = xtyle.LocalClient()
+    remote = xtyle.client(server.url)
+    item = create_component("custom-button")
+
+    assert local.ping().data["status"] == "ok"
+    assert local.minify("const a = 1;\n// note\nlet b = a + 2;") == "const a=1;let b=a+2;"
+    assert local.css("$c: red; a { color: $c; }") == "a{color:red}"
+    assert local.tsx("const a: number = 1;\nconst App = () => <b>{a}</b>;").endswith(
+        'const App = () => h("b", null, a);'
+    )
+    assert local.tsx("<") == ""
+
+    component = local.component(**item)
+    assert set(component) == set(remote.component(**item))
+    assert component["buildIndex"] == (
+        'const CustomButton=function(props={}){return h("div",null,props.children)};'
+    )
+    assert component["buildStyle"] == ".CustomButton{color:red}"
+    assert local.components([item], theme="theme") == [component]
+
+    plugin = local.plugin("myPlugin", [item], {"init": "export default [1]"})
+    assert set(plugin) == set(remote.plugin("myPlugin", [item]))
+    assert plugin["javascript"].startswith("var myPlugin={CustomButton:function(props={})")
+    assert "install:function(){return{init:[1],store:void 0" in plugin["javascript"]
+    assert plugin["style"] == ".CustomButton{color:red}"
+
+
+def test_stand_in_latency():
+    import time
+
+    with StandInServer(latency={"/minify": 0.05}, jitter=0.01, seed=0) as server:
+        engine = xtyle.client(server.url)
+        start = time.perf_counter()
+        assert engine.minify(" a ") == "a"
+        assert time.perf_counter() - start >= 0.05
+        assert server.delay("/ping") <= 0.01
+
+
+def test_deadline_and_retries():
+    from xtyle.resilience import DeadlineExceeded
+
+    failures = iter([503, 503])
+    routes = {"/minify": lambda data: next(failures, None) or {"code": "ok"}}
+    with StandInServer(routes=routes, latency={"/tsx": 0.5}) as server:
+        engine = xtyle.client(server.url, retries=2, backoff=0.01)
+        assert engine.minify("x") == "ok"
+        assert engine.counters["retries"] == 2
+        assert server.stats().requests["/minify"] == 3
+
+        # Not idempotent: no retries
+        server.routes["/component"] = lambda data: 503
+        assert engine.component(name="a") == ""
+        assert server.stats().requests["/component"] == 1
+
+        with pytest.raises(DeadlineExceeded):
+            engine.tsx("x", deadline=0.1)
+        assert engine.counters["deadline_exceeded"] == 1
+
+
+def test_hedged_requests():
+    import threading
+    import time
+
+    calls = []
+    lock = threading.Lock()
+
+    def slow_first(data):
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        if first:
+            time.sleep(1)
+        return {"code": "done"}
+
+    with StandInServer(routes={"/minify": slow_first}) as server:
+        engine = xtyle.client(server.url, hedge=0.05)
+        start = time.perf_counter()
+        assert engine.minify("x") == "done"
+        assert time.perf_counter() - start < 0.5
+        assert engine.counters["hedges"] == 1
+        assert engine.counters["hedge_wins"] == 1
+        engine.close()
+
+
+def test_circuit_breaker():
+    from xtyle.resilience import CircuitOpenError
+
+    with StandInServer() as server:
+        url = server.url
+    engine = xtyle.client(url, retries=0, breaker_failures=2, breaker_reset=60)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError) as error:
+            engine.minify("x")
+        assert not isinstance(error.value, CircuitOpenError)
+    with pytest.raises(CircuitOpenError):
+        engine.minify("x")
+    assert engine.breaker.state == "open"
+    assert (engine.breaker.trips, engine.breaker.rejected) == (1, 1)
+
+    engine.breaker.reset_timeout = 0
+    with StandInServer(port=int(url.rsplit(":", 1)[1])) as server:
+        assert engine.minify(" a ") == "a"
+    assert engine.breaker.state == "closed"
+
+
+def test_circuit_breaker_server_errors():
+    from xtyle.resilience import CircuitOpenError
+
+    # Up, but failing some inputs (500): the circuit stays closed
+    with StandInServer(routes={"/component": lambda data: 500}) as server:
+        engine = xtyle.client(server.url, breaker_failures=2)
+        assert [engine.component(name="bad") for _ in range(5)] == [""] * 5
+        assert engine.breaker.state == "closed"
+
+        # Down (503)
+        server.routes["/component"] = lambda data: 503
+        for _ in range(2):
+            engine.component(name="bad")
+        with pytest.raises(CircuitOpenError):
+            engine.component(name="bad")
+
+
+def test_compression():
+    from xtyle import PluginGzip
+
+    bundle = "const value = 1;\n" * 5000
+    assert PluginGzip.decompress(PluginGzip.compress(b"x", "deflate"), "deflate") == b"x"
+
+    with StandInServer() as server:
+        plain = xtyle.client(server.url)
+        assert plain.minify(bundle) == "const value = 1;" * 5000
+        stats = server.stats()
+        assert stats.bytes_in > len(bundle)
+        assert stats.bytes_out < 1000  # Response (gzip)
+
+        for encoding in ["gzip", "deflate"]:
+            engine = xtyle.client(server.url, compress=encoding, compress_min_bytes=1024)
+            before = server.stats().bytes_in
+            assert engine.minify(bundle) == "const value = 1;" * 5000
+            assert server.stats().bytes_in - before < 1000
+
+    # Servers without compression: plain bodies from then on
+    with StandInServer(compression=False) as server:
+        engine = xtyle.client(server.url, compress="gzip", compress_min_bytes=1)
+        assert engine.minify(" a ") == "a"
+        assert engine.compress is None
+        assert server.stats().requests["/minify"] == 2
+
+
+def test_client_stats():
+    routes = {"/scss": lambda data: 500}
+    with StandInServer(routes=routes) as server:
+        engine = xtyle.client(server.url, retries=1, backoff=0)
+        for index in range(3):
+            engine.minify(f" {index} ")
+        engine.css("a {}")
+
+        stats = engine.stats()
+        assert stats["/minify"]["count"] == 3
+        assert stats["/minify"]["errors"] == {}
+        assert stats["/minify"]["request_bytes"] == 3 * len(b'{"code":" 0 "}')
+        assert stats["/minify"]["response_bytes"] == 3 * len(b'{"code": "0"}')
+        assert stats["/minify"]["latency"]["count"] == 3
+        assert sum(stats["/minify"]["latency"]["buckets"].values()) == 3
+        assert stats["/scss"]["errors"] == {500: 2}
+
+    engine.close()
+    with pytest.raises(requests.ConnectionError):
+        engine.ping()
+    assert engine.stats()["/ping"]["errors"] == {"ConnectionError": 2}  # Retried
+
+    engine.reset_stats()
+    assert engine.stats() == {}
+    assert engine.counters["retries"] == 0
@@ -0,0 +1,204 @@
+import threading
+import time
+
+import xtyle
+from xtyle import core
+from xtyle.pool import ContextPool
+
+
+def test_lazy_engines():
+    core._pools.clear()
+    assert "jsx" not in core._pools
+
+    code = xtyle.jsx("const App = () => <div>Hello World</div>")
+    assert code.strip() == """const App = () => h("div", null, "Hello World");"""
+    assert core.pool_stats()["jsx"].created == 1
+    assert "prettier" not in core._pools
+
+
+def test_warmup():
+    core._pools.clear()
+    xtyle.warmup("prettier")
+    assert list(core._pools.keys()) == ["prettier"]
+    assert core.pool_stats()["prettier"].idle == 1
+
+    xtyle.warmup()
+    assert set(core._pools.keys()) == {"jsx", "prettier"}
+
+
+def test_prettier():
+    code = xtyle.prettier("const a = {b:1}", "javascript")
+    assert code.strip() == "const a = { b: 1 };"
+
+
+def test_context_pool():
+    release = threading.Event()
+    created = []
+
+    def factory():
+        created.append(object())
+        return created[-1]
+
+    pool = ContextPool(factory, size=2)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert pool.stats().in_use == 2
+
+    def worker():
+        with pool.context() as ctx:
+            assert ctx in created
+        release.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    limit = time.monotonic() + 5
+    while pool.stats().waiters == 0:
+        assert time.monotonic() < limit, "the worker never waited for a context"
+        time.sleep(0.001)
+    pool.release(first)
+    release.wait(5)
+    thread.join()
+    pool.release(second)
+
+    stats = pool.stats()
+    assert len(created) == 2
+    assert stats.in_use == 0
+    assert stats.idle == 2
+    assert stats.checkouts == 3
+    assert stats.waits == 1
+
+    pool.resize(1)
+    assert pool.stats().created == 1
+
+
+def test_context_pool_fill_after_shrink():
+    pool = ContextPool(object, size=2)
+    in_use = [pool.acquire(), pool.acquire()]
+    pool.resize(1)
+    pool.fill()
+    for ctx in in_use:
+        pool.release(ctx)
+    stats = pool.stats()
+    assert (stats.size, stats.created, stats.idle) == (1, 1, 1)
+
+
+def test_pool_threads():
+    core.configure_pool(2)
+    try:
+        results = {}
+
+        def worker(index):
+            results[index] = xtyle.jsx(f"const A{index} = () => <b />")
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results[3].strip() == 'const A3 = () => h("b", null);'
+        assert core.pool_stats()["jsx"].created <= 2
+    finally:
+        core.configure_pool(1)
+
+
+def test_jsx_many():
+    output = xtyle.jsx_many(
+        [
+            "const A = () => <div>A</div>",
+            "const B = () => <div>",
+            "const C = () => <div>C</div>",
+        ]
+    )
+    assert [item.error is None for item in output] == [True, False, True]
+    assert output[0].data.strip() == 'const A = () => h("div", null, "A");'
+    assert output[2].data.strip() == 'const C = () => h("div", null, "C");'
+
+
+def test_prettier_many():
+    output = xtyle.prettier_many(["body{color:red}", "body{"], "css")
+    assert output[0].data.strip() == "body {\n  color: red;\n}"
+    assert output[1].data is None
+    assert output[1].error
+
+
+def test_scss_many():
+    output = xtyle.scss_many(["$color: red; body { color: $color; }", "body {"])
+    assert output[0].data.strip() == "body{color:red}"
+    assert output[0].error is None
+    assert output[1].data is None
+    assert output[1].error
+
+    # Errors other than `sass.CompileError` fail their item only
+    output = xtyle.scss_many(["a { b: c; }", "\udcff"])
+    assert output[0].data.strip() == "a{b:c}"
+    assert output[1].data is None and output[1].error
+
+
+def test_cache(tmp_path):
+    cache = xtyle.enable_cache(path=tmp_path / "cache")
+    try:
+        code = "$color: blue; a { color: $color; }"
+        assert xtyle.scss(code) == xtyle.scss(code)
+        assert xtyle.cache_stats().hits == 1
+        assert xtyle.cache_stats().misses == 1
+
+        # Batch (only the missing items are compiled)
+        output = xtyle.scss_many([code, "b { color: red; }", "c {"])
+        assert output[0].data.strip() == "a{color:blue}"
+        assert output[2].error
+        assert xtyle.cache_stats().hits == 2
+
+        # Disk tier (survives a new cache)
+        cache = xtyle.enable_cache(path=tmp_path / "cache")
+        assert xtyle.scss(code).strip() == "a{color:blue}"
+        assert cache.stats().disk_hits == 1
+    finally:
+        xtyle.disable_cache()
+
+
+def test_cache_eviction():
+    from xtyle.cache import CompileCache
+
+    cache = CompileCache(max_bytes=20)
+    cache.set("a", "x" * 8)
+    cache.set("b", "y" * 8)
+    assert cache.get("a") == "x" * 8
+    cache.set("c", "z" * 8)
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 8
+    assert cache.stats().evictions == 1
+
+
+def test_cache_disk_eviction(tmp_path):
+    from xtyle.cache import CompileCache
+
+    cache = CompileCache(path=tmp_path, max_disk_bytes=50)
+    for index in range(10):
+        cache.set(str(index) * 4, "x" * 10)
+    stats = cache.stats()
+    assert stats.disk_evictions > 0
+    assert stats.disk_bytes <= 50
+
+
+def test_metrics():
+    from xtyle import metrics
+
+    events = []
+    metrics.reset()
+    metrics.add_exporter(lambda *event: events.append(event))
+    metrics.enable()
+    try:
+        for _ in range(3):
+            xtyle.scss("a { color: red; }")
+        metrics.count("builds", 2)
+    finally:
+        metrics.disable()
+        metrics.registry.exporters.clear()
+
+    xtyle.scss("a { color: red; }")
+    assert len([event for event in events if event[1] == "core.scss"]) == 3
+
+    report = metrics.report()
+    assert report["spans"]["core.scss"]["count"] == 3
+    assert report["spans"]["core.scss"]["p99"] >= report["spans"]["core.scss"]["p50"]
+    assert report["counters"] == {"builds": 2}
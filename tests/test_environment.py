@@ -0,0 +1,344 @@
+import pathlib
+
+import pytest
+
+import xtyle
+from xtyle.live_code import environment as environment_module
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    # No network (xtyle types)
+    monkeypatch.setattr(environment_module, "get_xtyle_declarations", lambda: "")
+    return xtyle.Environment(base_dir=pathlib.Path(tmp_path))
+
+
+def test_build_styles(env):
+    env.set("style", {"name": "one", "code": "$c: red; a { color: $c; }"}, "app")
+    env.set("style", {"name": "two", "code": "b {"}, "app")
+    env.set("style", {"name": "three", "code": "i { color: blue; }"}, "other")
+
+    assert env.build_styles("app") == "a{color:red}\n\nb {"
+    assert env.build_all_styles(["app", "other"]) == {
+        "app": ["a{color:red}\n", "b {"],
+        "other": ["i{color:blue}\n"],
+    }
+
+
+def test_synthetic(env, tmp_path):
+    from xtyle.live_code import synthetic
+
+    output = synthetic.populate(env, modules=2, components=3, views=2, seed=7)
+    assert output.modules == ["module-0", "module-1"]
+    assert output.components == 6
+
+    assert len(env.all("component", "module-1")) == 3
+    assert len(env.all("view", "module-0")) == 2
+    assert env.get("props", "props-0")
+    assert env.get("plugin", "plugin-0")
+    assert len(list((tmp_path / ".xtyle_db" / ".xtyle").glob("*.sqlite3"))) == 2
+
+    # Deterministic
+    again = xtyle.Environment(base_dir=pathlib.Path(tmp_path / "again"))
+    synthetic.populate(again, modules=2, components=3, views=2, seed=7)
+    assert again.all("component", "module-1") == env.all("component", "module-1")
+
+
+def test_export_module_zip_concurrent(env):
+    from xtyle.live_code import synthetic
+    from xtyle.stand_in import StandInServer
+
+    synthetic.populate(env, modules=1, components=4)
+    with StandInServer() as server:
+        env.xtyle_client = xtyle.client(server.url)
+        serial = env.compile_components(
+            [{"name": f"item-{i}", "code": "x"} for i in range(4)], "module-0"
+        )
+        env.xtyle_concurrency = 4
+        concurrent = env.compile_components(
+            [{"name": f"item-{i}", "code": "x"} for i in range(4)], "module-0"
+        )
+        assert concurrent == serial
+        assert env.export_module_zip("module-0")
+        assert server.stats().requests == {"/components": 1, "/component": 8}
+
+
+def test_local_client(env):
+    from xtyle.live_code import synthetic
+
+    synthetic.populate(env, modules=1, components=2)
+    env.xtyle_client = xtyle.LocalClient()
+    env.xtyle_concurrency = 4
+    assert env.build_components("module-0").javascript.startswith("var module0=")
+    assert env.export_module_zip("module-0")
+
+
+def test_module_tables_cache(env):
+    import threading
+
+    env.set("module", {"name": "app", **env.sample_module()})
+    env.set("component", {"name": "one", "code": "a"}, "app")
+    theme = env.environment_module("app")
+    assert env.environment_module("app") is theme
+    assert env._get_table("component", "app") is theme.component
+
+    # Shared between threads
+    errors = []
+
+    def read():
+        try:
+            for _ in range(20):
+                assert env.get("component", "one", "app")["code"] == "a"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    assert errors == []
+
+    # Invalidation
+    assert env.clone_module("app", "copy")
+    assert env.get("component", "one", "copy")["code"] == "a"
+    old_id = env._module_id("app")
+    assert env.delete("module", "app")
+    assert "app" not in env._modules
+    assert env.all("component", "app") == []
+    assert env._module_id("app") != old_id
+
+
+def test_single_file_storage(tmp_path, monkeypatch):
+    from xtyle.live_code import synthetic
+
+    monkeypatch.setattr(environment_module, "get_xtyle_declarations", lambda: "")
+    base_dir = pathlib.Path(tmp_path)
+    files = xtyle.Environment(base_dir=base_dir)
+    synthetic.populate(files, modules=2, components=3, views=1, styles=1)
+    expected = files.all("component", "module-1")
+
+    # Migration
+    env = xtyle.Environment(
+        base_dir=base_dir, storage_mode="single", xtyle_client=xtyle.LocalClient()
+    )
+    assert env.migrate_storage(remove_files=True) == {"module-0": 5, "module-1": 5}
+    assert env.migrate_storage() == {}
+    assert not list((base_dir / ".xtyle_db" / ".xtyle").glob("*.sqlite3"))
+    assert [row["code"] for row in env.all("component", "module-1")] == [
+        row["code"] for row in expected
+    ]
+    # Same names, different modules
+    assert env.get("component", "component-0", "module-0")
+    assert env.set("component", {"name": "extra", "code": "x"}, "module-0")
+    assert env.get("component", "extra", "module-1") is None
+
+    # Clone, destroy and export
+    assert env.clone_module("module-0", "copy")
+    assert len(env.all("component", "copy")) == 4
+    assert env.export_module_zip("copy")
+    assert env.delete("module", "module-0")
+    assert env.all("component", "module-0") == []
+    assert len(env.all("component", "copy")) == 4
+
+
+def test_indexes_and_get_many(env, tmp_path):
+    import sqlite3
+
+    from xtyle.live_code import storage, synthetic, types
+
+    # Tables without the `UNIQUE(name)` constraint get an index
+    database = tmp_path / "legacy.sqlite3"
+    with sqlite3.connect(database) as connection:
+        connection.execute("CREATE TABLE cache (id INTEGER PRIMARY KEY, name TEXT)")
+    table = storage.table(database, types.Cache)
+    assert table._indexed(("name",))
+
+    table.set(name="My Name")
+    table.set(name="7")
+    assert table.get_many(["My Name", "7", "missing"]).keys() == {"My Name", "7"}
+
+    # Builds: one query for the cache rows of every module
+    synthetic.populate(env, modules=3, components=2)
+    env.xtyle_client = xtyle.LocalClient()
+    calls = []
+    get_by = env.environment.cache.get_by
+    env.environment.cache.get_by = lambda **kw: calls.append(kw) or get_by(**kw)
+    apps = env._collect_applications().apps
+    assert sorted(apps) == ["module-0", "module-1", "module-2"]
+    assert not [kw for kw in calls if str(kw.get("name")).isdigit()]
+
+
+def test_bulk_set_and_transaction(env):
+    env.set("module", {"name": "app", **env.sample_module()})
+    rows = [{"name": f"item-{i}", "code": str(i)} for i in range(50)]
+    assert env.bulk_set("component", rows, "app")
+    assert len(env.all("component", "app")) == 50
+
+    # All or nothing
+    broken = [{"name": "ok", "code": "x"}, {"name": "bad", "unknown": 1}]
+    assert not env.bulk_set("component", broken, "app")
+    assert env.get("component", "ok", "app") is None
+
+    with pytest.raises(RuntimeError):
+        with env.transaction():
+            env.set("component", {"name": "one", "code": "1"}, "app")
+            env.set("view", {"name": "one", "code": "1"}, "app")
+            raise RuntimeError
+    assert env.get("component", "one", "app") is None
+    assert env.get("view", "one", "app") is None
+
+    # Nested blocks commit with the outermost one
+    with env.transaction():
+        env.set("component", {"name": "one", "code": "1"}, "app")
+        with env.transaction():
+            env.set("component", {"name": "two", "code": "2"}, "app")
+        assert env.get("component", "two", "app")
+    assert env.get("component", "two", "app")["code"] == "2"
+
+
+def test_sqlite_pragmas(env, tmp_path, monkeypatch):
+    import threading
+
+    cache = env.environment.cache
+    assert cache.fetch_one("PRAGMA journal_mode")[0] == "wal"
+    assert cache.fetch_one("PRAGMA synchronous")[0] == 1  # NORMAL
+
+    # Readers run while a write is in progress
+    env.set("component", {"name": "one", "code": "1"}, "app")
+    reads = []
+    with env.transaction():
+        env.set("component", {"name": "two", "code": "2"}, "app")
+        reader = threading.Thread(
+            target=lambda: reads.append(env.all("component", "app"))
+        )
+        reader.start()
+        reader.join(timeout=2)
+    assert [row["name"] for row in reads[0]] == ["one"]
+    assert len(env.all("component", "app")) == 2
+
+    # Copies keep the rows in the WAL
+    assert env.clone_module("app", "copy")
+    assert len(env.all("component", "copy")) == 2
+
+    # Per environment
+    monkeypatch.setattr(environment_module, "get_xtyle_declarations", lambda: "")
+    other = xtyle.Environment(
+        base_dir=tmp_path / "other", journal_mode="delete", synchronous="full"
+    )
+    assert other.environment.cache.fetch_one("PRAGMA journal_mode")[0] == "delete"
+    with pytest.raises(ValueError):
+        xtyle.Environment(base_dir=tmp_path / "bad", journal_mode="fast")
+
+
+def test_rows_for_tables(env):
+    rows = [{"name": f"item-{i}", "code": "x" * 1000} for i in range(5)]
+    env.bulk_set("component", rows, "app")
+
+    listing = env.rows_for_tables("component", "app")
+    assert listing == [{"id": i + 1, "name": f"item-{i}"} for i in range(5)]
+    assert env.rows_for_tables("sample", fields=["name", "language"])[0] == {
+        "name": "base",
+        "language": "html",
+    }
+
+    # Pages
+    page = env.rows_for_tables("component", "app", limit=2)
+    assert page["total"] == 5 and page["next"] == 2
+    assert [row["name"] for row in page["rows"]] == ["item-0", "item-1"]
+    page = env.rows_for_tables("component", "app", limit=2, after=page["next"])
+    assert [row["name"] for row in page["rows"]] == ["item-2", "item-3"]
+    page = env.rows_for_tables("component", "app", offset=4, limit=2)
+    assert page["rows"] == [{"id": 5, "name": "item-4"}] and page["next"] is None
+
+    # The cursor does not need `id` in the listed fields
+    page = env.rows_for_tables("component", "app", fields=["name"], limit=3)
+    assert page["rows"] == [{"name": f"item-{i}"} for i in range(3)]
+    page = env.rows_for_tables("component", "app", fields=["name"], after=page["next"])
+    assert page["rows"] == [{"name": "item-3"}, {"name": "item-4"}]
+
+
+@pytest.mark.parametrize("mode", ["files", "single"])
+def test_rollback_forgets_new_modules(tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(environment_module, "get_xtyle_declarations", lambda: "")
+    env = xtyle.Environment(base_dir=pathlib.Path(tmp_path), storage_mode=mode)
+
+    # The module row of "theme-a" is rolled back (with its cached ID)
+    broken = [{"name": "a"}, {"name": "b", "bogus": 1}]
+    assert not env.bulk_set("component", broken, "theme-a")
+    with pytest.raises(RuntimeError):
+        with env.transaction():
+            env.set("component", {"name": "c"}, "theme-c")
+            raise RuntimeError
+
+    assert env.set("component", {"name": "b-private"}, "theme-b")
+    assert env.set("component", {"name": "a-private"}, "theme-a")
+    assert [row["name"] for row in env.all("component", "theme-b")] == ["b-private"]
+    assert [row["name"] for row in env.all("component", "theme-a")] == ["a-private"]
+
+
+def test_bulk_set_constraint_failure(env):
+    env.set("component", {"name": "taken", "code": "old"}, "app")
+
+    # Duplicated name: nothing is written
+    rows = [{"name": "new", "code": "1"}, {"name": "taken", "code": "2"}]
+    assert not env.bulk_set("component", rows, "app")
+    assert env.get("component", "new", "app") is None
+    assert env.get("component", "taken", "app")["code"] == "old"
+
+    # Outside a transaction `set` keeps the sqlow behavior (ignored)
+    assert env.set("component", {"name": "taken", "code": "3"}, "app")
+    assert env.get("component", "taken", "app")["code"] == "old"
+
+
+def test_api_control_listing(tmp_path, monkeypatch):
+    monkeypatch.setattr(environment_module, "get_xtyle_declarations", lambda: "")
+    app = xtyle.App(root_path=pathlib.Path(tmp_path), debug=True)
+    app.devs.bulk_set("component", [{"name": f"c-{i}"} for i in range(3)], "app")
+    control = lambda **kw: app.api_control(model="component", module="app", **kw)
+
+    assert len(control(action="all", input=None)) == 3
+    assert len(control(action="all")) == 3
+    page = control(action="all", input={"limit": "2", "fields": ["name"]})
+    assert page["rows"] == [{"name": "c-0"}, {"name": "c-1"}] and page["next"] == 2
+    page = control(action="all", input={"limit": "2", "after": str(page["next"])})
+    assert page["rows"] == [{"id": 3, "name": "c-2"}] and page["next"] is None
+
+
+def test_transaction_failed_set(env):
+    env.set("component", {"name": "taken", "code": "old"}, "app")
+
+    # A failed `set` rolls back the whole block
+    with pytest.raises(Exception):
+        with env.transaction():
+            assert env.set("component", {"name": "new", "code": "1"}, "app")
+            env.set("component", {"name": "taken", "code": "2"}, "app")
+    assert env.get("component", "new", "app") is None
+    assert env.get("component", "taken", "app")["code"] == "old"
+
+    # So does a failed `bulk_set` inside a larger block
+    with pytest.raises(Exception):
+        with env.transaction():
+            env.set("component", {"name": "new", "code": "1"}, "app")
+            env.bulk_set("component", [{"name": "bad", "unknown": 1}], "app")
+    assert env.get("component", "new", "app") is None
+
+
+@pytest.mark.parametrize("mode", ["files", "single"])
+def test_journal_mode_in_transactions(tmp_path, monkeypatch, mode):
+    from xtyle.live_code import synthetic
+
+    monkeypatch.setattr(environment_module, "get_xtyle_declarations", lambda: "")
+    env = xtyle.Environment(base_dir=pathlib.Path(tmp_path), storage_mode=mode)
+
+    # Module databases first opened inside `bulk_set` (new modules)
+    synthetic.populate(env, modules=2, components=2)
+    assert env.bulk_set("component", [{"name": "a"}], "fresh")
+    assert env.clone_module("fresh", "copy")
+    for name in ["module-0", "module-1", "fresh", "copy"]:
+        table = env.environment_module(name).component
+        assert table.fetch_one("PRAGMA journal_mode")[0] == "wal"
+
+
+def test_clone_missing_module(env, tmp_path):
+    databases = tmp_path / ".xtyle_db" / ".xtyle"
+    assert not env.clone_module("ghost", "copy")
+    assert list(databases.glob("*.sqlite3")) == []
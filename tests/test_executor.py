@@ -0,0 +1,37 @@
+import xtyle
+from xtyle.executor import InlineExecutor, ProcessExecutor, get_executor
+
+
+CODES = [f".item-{index} {{ $size: {index}px; width: $size; }}" for index in range(10)]
+
+
+def test_inline_executor():
+    output = InlineExecutor().map("scss", CODES + ["a {"])
+    assert output[3].data.strip() == ".item-3{width:3px}"
+    assert output[-1].error
+
+
+def test_process_executor():
+    with ProcessExecutor(workers=2, chunk_size=3, tools=("scss",)) as executor:
+        output = executor.map("scss", CODES)
+    assert [item.data for item in output] == [xtyle.scss(code) for code in CODES]
+
+
+def test_get_executor():
+    assert isinstance(get_executor(0), InlineExecutor)
+    executor = get_executor(2)
+    assert isinstance(executor, ProcessExecutor)
+    assert executor.workers == 2
+
+
+def test_worker_warmup(monkeypatch):
+    from xtyle import core, executor as executor_module
+
+    warmed = []
+    monkeypatch.setattr(core, "warmup", lambda *tools: warmed.append(tools))
+    assert ProcessExecutor().tools == ()
+    executor_module._init_worker(())
+    executor_module._init_worker(("scss",))  # No engine (libsass)
+    assert warmed == []
+    executor_module._init_worker(("jsx", "scss"))
+    assert warmed == [("jsx",)]